@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+from logical import service
+from logical.schema import ClaimRecord, ConstraintRecord, ExtractionResult
+from logical.service import add_extraction
+from logical.store import KnowledgeStore
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--claims", type=int, default=60_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    def extraction() -> ExtractionResult:
+        return ExtractionResult(
+            claims=[
+                ClaimRecord(
+                    s=f"entity {index % 5000}",
+                    p=f"property {index % 3}",
+                    o=f"value {index % 7}",
+                    source_text=f"entity {index % 5000} has value {index}",
+                )
+                for index in range(args.claims)
+            ],
+            constraints=[
+                ConstraintRecord(
+                    kind="functional_for_subject",
+                    s=f"entity {index}",
+                    p="property 0",
+                    source_claim_id=f"constraint-{index}",
+                )
+                for index in range(5000)
+            ],
+        )
+
+    if not service._can_fork(service.KnowledgeSnapshot(), args.claims):
+        print("parallel import is unavailable here; both runs are sequential")
+
+    outcomes = []
+    for workers in (None, args.workers):
+        with tempfile.TemporaryDirectory() as root:
+            store = KnowledgeStore(root)
+            started = time.perf_counter()
+            result = add_extraction(extraction(), store, workers=workers)
+            elapsed = time.perf_counter() - started
+        outcomes.append(
+            (
+                [claim.id for claim in result.accepted],
+                [claim.id for claim in result.quarantined],
+                [conflict.message for conflict in result.conflicts],
+            )
+        )
+        print(
+            f"workers={workers or 1}: {elapsed:.3f}s for {args.claims} claims "
+            f"({len(result.accepted)} accepted, {len(result.quarantined)} quarantined)"
+        )
+    print("identical outcomes" if outcomes[0] == outcomes[1] else "OUTCOMES DIFFER")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from logical.schema import (
+    ClaimRecord,
+    record_from_dict,
+    record_from_stored,
+    record_to_dict,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=100_000)
+    args = parser.parse_args()
+
+    lines = [
+        json.dumps(
+            record_to_dict(
+                ClaimRecord(
+                    s=f"entity {index % 5000}",
+                    p=f"property {index % 17}",
+                    o=f"value {index}",
+                    source_text=f"entity {index % 5000} has value {index}",
+                )
+            ),
+            sort_keys=True,
+        )
+        for index in range(args.records)
+    ]
+
+    for name, loader in (
+        ("record_from_dict", record_from_dict),
+        ("record_from_stored", record_from_stored),
+    ):
+        started = time.perf_counter()
+        for line in lines:
+            loader(json.loads(line))
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name}: {elapsed:.3f}s for {args.records} records "
+            f"({elapsed / args.records * 1e6:.2f} us/record)"
+        )
+
+
+if __name__ == "__main__":
+    main()
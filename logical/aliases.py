@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from itertools import product
+from typing import Iterable, Iterator
+
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    QueryIntent,
+    claim_id_for,
+    is_variable,
+)
+
+
+class AliasIndex:
+    def __init__(self, aliases: Iterable[AliasRecord] = ()) -> None:
+        self.parents: dict[str, str] = {}
+        self.classes: dict[str, list[str]] = {}
+        self.update(aliases)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def __bool__(self) -> bool:
+        return bool(self.parents)
+
+    def update(self, aliases: Iterable[AliasRecord]) -> None:
+        for alias in aliases:
+            self.add(alias)
+
+    def add(self, alias: AliasRecord) -> None:
+        root = self.find(alias.canonical)
+        other = self.find(alias.alias)
+        if root == other:
+            return
+        self.parents[other] = root
+        self.parents.setdefault(root, root)
+        members = self.classes.pop(other, [other])
+        self.classes.setdefault(root, [root]).extend(members)
+
+    def find(self, term: str) -> str:
+        parents = self.parents
+        if term not in parents:
+            return term
+        while parents[term] != term:
+            parents[term] = parents[parents[term]]
+            term = parents[term]
+        return term
+
+    def members(self, term: str) -> list[str]:
+        return list(self.classes.get(self.find(term), [term]))
+
+    def canonical_triple(self, s: str, p: str, o: str) -> tuple[str, str, str]:
+        return self.find(s), self.find(p), self.find(o)
+
+    def canonical_claim(self, claim: ClaimRecord) -> ClaimRecord:
+        s, p, o = self.canonical_triple(claim.s, claim.p, claim.o)
+        if (s, p, o) == (claim.s, claim.p, claim.o):
+            return claim
+        claim_id = claim.id
+        if claim_id == claim_id_for(claim.s, claim.p, claim.o, claim.polarity):
+            claim_id = claim_id_for(s, p, o, claim.polarity)
+        return replace(claim, s=s, p=p, o=o, id=claim_id)
+
+    def canonical_view(self, claim: ClaimRecord) -> ClaimRecord:
+        s, p, o = self.canonical_triple(claim.s, claim.p, claim.o)
+        if (s, p, o) == (claim.s, claim.p, claim.o):
+            return claim
+        return replace(claim, s=s, p=p, o=o)
+
+    def canonical_constraint(self, constraint: ConstraintRecord) -> ConstraintRecord:
+        s, p = self.find(constraint.s), self.find(constraint.p)
+        o = self.find(constraint.o) if constraint.o else ""
+        if (s, p, o) == (constraint.s, constraint.p, constraint.o):
+            return constraint
+        return replace(constraint, s=s, p=p, o=o)
+
+    def canonical_query(self, query: QueryIntent) -> QueryIntent:
+        terms = [
+            term if is_variable(term) else self.find(term)
+            for term in (query.s, query.p, query.o)
+        ]
+        if terms == [query.s, query.p, query.o]:
+            return query
+        return QueryIntent(*terms, polarity=query.polarity)
+
+    def canonical_triples(
+        self,
+        triples: Iterable[tuple[str, str, str, bool] | tuple[str, str, str, bool, str]],
+    ) -> Iterator[tuple[str, str, str, bool] | tuple[str, str, str, bool, str]]:
+        if not self:
+            yield from triples
+            return
+        for s, p, o, *rest in triples:
+            yield (*self.canonical_triple(s, p, o), *rest)
+
+    def spellings(
+        self, s: str | None, p: str | None, o: str | None
+    ) -> Iterator[tuple[str | None, str | None, str | None]]:
+        choices = [[None] if term is None else self.members(term) for term in (s, p, o)]
+        return product(*choices)
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from itertools import groupby
+from typing import Any
+
+from logical.schema import KnowledgeStatus
+from logical.snapshot import KnowledgeSnapshot
+from logical.terms import TermDictionary, TripleColumns
+
+
+@dataclass(frozen=True)
+class Contradiction:
+    s: str
+    p: str
+    o: str
+    asserted: list[str]
+    denied: list[str]
+
+
+@dataclass(frozen=True)
+class FunctionalViolation:
+    s: str
+    p: str
+    values: dict[str, list[str]]
+
+
+@dataclass
+class AuditReport:
+    claims: int
+    contradictions: list[Contradiction] = field(default_factory=list)
+    functional_violations: list[FunctionalViolation] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.contradictions and not self.functional_violations
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "claims": self.claims,
+            "counts": {
+                "contradictions": len(self.contradictions),
+                "functional_violations": len(self.functional_violations),
+            },
+            "contradictions": [
+                {
+                    "s": item.s,
+                    "p": item.p,
+                    "o": item.o,
+                    "asserted": item.asserted,
+                    "denied": item.denied,
+                }
+                for item in self.contradictions
+            ],
+            "functional_violations": [
+                {"s": item.s, "p": item.p, "values": item.values}
+                for item in self.functional_violations
+            ],
+        }
+
+
+def audit_snapshot(snapshot: KnowledgeSnapshot) -> AuditReport:
+    aliases = snapshot.alias_index()
+    terms = TermDictionary()
+    columns = TripleColumns()
+    claim_ids: list[str] = []
+    accepted = snapshot.claim_triples(KnowledgeStatus.ACCEPTED)
+    for s, p, o, polarity, claim_id in aliases.canonical_triples(accepted):
+        columns.append(
+            terms.intern(s),
+            terms.intern(p),
+            terms.intern(o),
+            polarity,
+            KnowledgeStatus.ACCEPTED,
+        )
+        claim_ids.append(claim_id)
+    functional: set[tuple[int, int]] = set()
+    for constraint in map(aliases.canonical_constraint, snapshot.constraints()):
+        if constraint.kind == "functional_for_subject":
+            s_id, p_id = terms.lookup(constraint.s), terms.lookup(constraint.p)
+            if s_id is not None and p_id is not None:
+                functional.add((s_id, p_id))
+
+    report = AuditReport(claims=len(columns))
+    width = len(terms)
+    keys = [
+        ((s * width + p) * width + o) * 2 + polarity
+        for s, p, o, polarity in zip(columns.s, columns.p, columns.o, columns.polarity)
+    ]
+    span = 2 * width
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    for _, group in groupby(order, key=lambda row: keys[row] // span):
+        _audit_group(list(group), columns, terms, claim_ids, functional, report)
+    return report
+
+
+def _audit_group(
+    rows: list[int],
+    columns: TripleColumns,
+    terms: TermDictionary,
+    claim_ids: list[str],
+    functional: set[tuple[int, int]],
+    report: AuditReport,
+) -> None:
+    by_object: dict[int, tuple[list[str], list[str]]] = {}
+    for row in rows:
+        denied, asserted = by_object.setdefault(columns.o[row], ([], []))
+        (asserted if columns.polarity[row] else denied).append(claim_ids[row])
+    s = terms.term(columns.s[rows[0]])
+    p = terms.term(columns.p[rows[0]])
+    for o_id, (denied, asserted) in by_object.items():
+        if asserted and denied:
+            report.contradictions.append(
+                Contradiction(
+                    s=s, p=p, o=terms.term(o_id), asserted=asserted, denied=denied
+                )
+            )
+    values = {
+        terms.term(o_id): asserted
+        for o_id, (_, asserted) in by_object.items()
+        if asserted
+    }
+    if len(values) > 1 and (columns.s[rows[0]], columns.p[rows[0]]) in functional:
+        report.functional_violations.append(
+            FunctionalViolation(s=s, p=p, values=values)
+        )
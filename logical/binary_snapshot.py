@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+import json
+import mmap
+import os
+from pathlib import Path
+import struct
+from typing import Iterable
+import zlib
+
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    StatusRecord,
+    record_from_stored,
+)
+from logical.snapshot import KnowledgeSnapshot
+
+
+MAGIC = b"LOGSNAP1"
+VERSION = 3
+HEADER = struct.Struct("<8sIIQQQQQQ")
+READ_CHUNK = 4096
+CHECKSUM_WINDOW = 4096
+SECTIONS = (
+    ("term_offsets", "Q"),
+    ("term_blob", "B"),
+    ("term_order", "I"),
+    ("s", "I"),
+    ("p", "I"),
+    ("o", "I"),
+    ("polarity", "B"),
+    ("status", "B"),
+    ("spo_order", "I"),
+    ("po_order", "I"),
+    ("id_offsets", "Q"),
+    ("id_blob", "B"),
+    ("id_order", "I"),
+    ("claim_offsets", "Q"),
+    ("record_kinds", "B"),
+    ("other_offsets", "Q"),
+)
+SECTION_TABLE = struct.Struct("<" + "QQ" * len(SECTIONS))
+
+
+def write_snapshot(
+    path: str | Path,
+    records: Iterable[
+        tuple[int, ClaimRecord | AliasRecord | ConstraintRecord | StatusRecord]
+    ],
+    inode: int,
+    watermark: int,
+    checksum: int,
+) -> Path:
+    snapshot = KnowledgeSnapshot()
+    claim_offsets = array("Q")
+    other_offsets = array("Q")
+    for offset, record in records:
+        if isinstance(record, ClaimRecord):
+            claim_offsets.append(offset)
+        elif not isinstance(record, StatusRecord):
+            other_offsets.append(offset)
+        snapshot.add(record)
+
+    terms = [term.encode("utf-8") for term in snapshot.terms.terms]
+    claim_ids = [claim_id.encode("utf-8") for claim_id in snapshot.claim_ids]
+    columns = snapshot.columns
+    sections = {
+        "term_offsets": _string_offsets(terms),
+        "term_blob": b"".join(terms),
+        "term_order": array("I", sorted(range(len(terms)), key=terms.__getitem__)),
+        "s": columns.s,
+        "p": columns.p,
+        "o": columns.o,
+        "polarity": columns.polarity,
+        "status": columns.status,
+        "spo_order": array(
+            "I",
+            sorted(
+                range(len(columns)),
+                key=lambda row: (columns.s[row], columns.p[row], columns.o[row], row),
+            ),
+        ),
+        "po_order": array(
+            "I",
+            sorted(
+                range(len(columns)),
+                key=lambda row: (columns.p[row], columns.o[row], row),
+            ),
+        ),
+        "id_offsets": _string_offsets(claim_ids),
+        "id_blob": b"".join(claim_ids),
+        "id_order": array("I", sorted(range(len(claim_ids)), key=claim_ids.__getitem__)),
+        "claim_offsets": claim_offsets,
+        "record_kinds": snapshot.kinds,
+        "other_offsets": other_offsets,
+    }
+
+    path = Path(path)
+    temp_path = path.with_suffix(".tmp")
+    with temp_path.open("wb") as handle:
+        handle.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                checksum,
+                inode,
+                watermark,
+                snapshot.status_changes,
+                len(terms),
+                len(columns),
+                len(snapshot),
+            )
+        )
+        position = HEADER.size + SECTION_TABLE.size
+        table = []
+        payloads = []
+        for name, _ in SECTIONS:
+            payload = bytes(sections[name])
+            position += -position % 8
+            table.extend([position, len(payload)])
+            payloads.append((position, payload))
+            position += len(payload)
+        handle.write(SECTION_TABLE.pack(*table))
+        for position, payload in payloads:
+            handle.seek(position)
+            handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    return path
+
+
+class MappedSnapshot:
+    def __init__(self, path: str | Path, knowledge_path: str | Path) -> None:
+        self.path = Path(path)
+        self.knowledge_path = Path(knowledge_path)
+        with self.path.open("rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = self._view = memoryview(self._map)
+        (
+            magic,
+            version,
+            self.checksum,
+            self.inode,
+            self.watermark,
+            self.status_changes,
+            self.term_count,
+            self.claim_count,
+            self.record_count,
+        ) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} logical snapshot")
+        table = SECTION_TABLE.unpack_from(view, HEADER.size)
+        for index, (name, code) in enumerate(SECTIONS):
+            start, length = table[index * 2], table[index * 2 + 1]
+            setattr(self, name, view[start : start + length].cast(code))
+        self._descriptor: int | None = None
+
+    @classmethod
+    def open(cls, path: str | Path, knowledge_path: str | Path) -> MappedSnapshot | None:
+        try:
+            return cls(path, knowledge_path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    def __enter__(self) -> MappedSnapshot:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.term_count
+
+    def term(self, term_id: int) -> str:
+        return self._string(self.term_offsets, self.term_blob, term_id).decode("utf-8")
+
+    def lookup(self, term: str) -> int | None:
+        return self._search(
+            term.encode("utf-8"), self.term_order, self.term_offsets, self.term_blob
+        )
+
+    def claim_row(self, claim_id: str) -> int | None:
+        return self._search(
+            claim_id.encode("utf-8"), self.id_order, self.id_offsets, self.id_blob
+        )
+
+    def claim_id(self, row: int) -> str:
+        return self._string(self.id_offsets, self.id_blob, row).decode("utf-8")
+
+    def rows(
+        self, s: int | None = None, p: int | None = None, o: int | None = None
+    ) -> list[int]:
+        if s is None and p is None:
+            return [
+                row for row in range(self.claim_count) if o is None or self.o[row] == o
+            ]
+        if s is None:
+            if o is None:
+                low, high = (p, 0), (p + 1, 0)
+            else:
+                low, high = (p, o), (p, o + 1)
+            start = bisect_left(self.po_order, low, key=self._po_key)
+            end = bisect_left(self.po_order, high, lo=start, key=self._po_key)
+            return sorted(self.po_order[start:end])
+        if p is None:
+            low, high = (s, 0, 0), (s + 1, 0, 0)
+        elif o is None:
+            low, high = (s, p, 0), (s, p + 1, 0)
+        else:
+            low, high = (s, p, o), (s, p, o + 1)
+        key = self._spo_key
+        start = bisect_left(self.spo_order, low, key=key)
+        end = bisect_left(self.spo_order, high, lo=start, key=key)
+        rows = sorted(self.spo_order[start:end])
+        if p is None and o is not None:
+            return [row for row in rows if self.o[row] == o]
+        return rows
+
+    def read_claim(self, row: int) -> ClaimRecord:
+        return self.read_record(self.claim_offsets[row])
+
+    def read_record(self, offset: int) -> ClaimRecord | AliasRecord | ConstraintRecord:
+        if self._descriptor is None:
+            self._descriptor = os.open(self.knowledge_path, os.O_RDONLY)
+        line = b""
+        while not line.endswith(b"\n"):
+            chunk = os.pread(self._descriptor, READ_CHUNK, offset + len(line))
+            if not chunk:
+                break
+            end = chunk.find(b"\n")
+            line += chunk if end == -1 else chunk[: end + 1]
+        return record_from_stored(json.loads(line))
+
+    def close(self) -> None:
+        if self._descriptor is not None:
+            os.close(self._descriptor)
+            self._descriptor = None
+        if self._map.closed:
+            return
+        for name, _ in SECTIONS:
+            getattr(self, name).release()
+        self._view.release()
+        self._map.close()
+
+    def _spo_key(self, row: int) -> tuple[int, int, int]:
+        return (self.s[row], self.p[row], self.o[row])
+
+    def _po_key(self, row: int) -> tuple[int, int]:
+        return (self.p[row], self.o[row])
+
+    def _string(self, offsets: memoryview, blob: memoryview, index: int) -> bytes:
+        return bytes(blob[offsets[index] : offsets[index + 1]])
+
+    def _search(
+        self, value: bytes, order: memoryview, offsets: memoryview, blob: memoryview
+    ) -> int | None:
+        position = bisect_left(
+            order, value, key=lambda index: self._string(offsets, blob, index)
+        )
+        if position < len(order) and self._string(offsets, blob, order[position]) == value:
+            return order[position]
+        return None
+
+
+def prefix_checksum(path: str | Path, watermark: int) -> int:
+    with Path(path).open("rb") as handle:
+        head = handle.read(min(watermark, CHECKSUM_WINDOW))
+        start = max(0, watermark - CHECKSUM_WINDOW)
+        handle.seek(start)
+        tail = handle.read(watermark - start)
+    return zlib.crc32(tail, zlib.crc32(head))
+
+
+def _string_offsets(values: list[bytes]) -> array:
+    offsets = array("Q", [0])
+    for value in values:
+        offsets.append(offsets[-1] + len(value))
+    return offsets
@@ -1,16 +1,33 @@
 from __future__ import annotations
 
 import argparse
+import json
+import sys
 from typing import Sequence
 
-from logical.openai_client import OpenAIExtractor
-from logical.service import add_knowledge, ask_knowledge, check_knowledge, export_prolog
-from logical.store import KnowledgeStore
+from logical.engine import ENGINES
+from logical.openai_client import OpenAIExtractor, parse_extraction_response
+from logical.prolog import PROJECTIONS
+from logical.service import (
+    add_knowledge,
+    audit_knowledge,
+    ask_knowledge,
+    ask_many,
+    check_knowledge,
+    compact_knowledge,
+    import_extractions,
+    snapshot_knowledge,
+    write_prolog,
+)
+from logical.store import STORE_BACKENDS, KnowledgeStore, open_store
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="logical")
     parser.add_argument("--store-dir", default=".logical")
+    parser.add_argument("--store-backend", choices=STORE_BACKENDS, default="jsonl")
+    parser.add_argument("--fsync", action="store_true")
+    parser.add_argument("--projection", choices=PROJECTIONS, default="triples")
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     add_parser = subparsers.add_parser("add")
@@ -18,11 +35,29 @@ def build_parser() -> argparse.ArgumentParser:
     add_parser.add_argument("--interactive", action="store_true")
     add_parser.add_argument("--noninteractive", action="store_true")
 
+    import_parser = subparsers.add_parser("import")
+    import_parser.add_argument("extractions", type=argparse.FileType("r"))
+    import_parser.add_argument("--workers", type=int)
+
     ask_parser = subparsers.add_parser("ask")
     ask_parser.add_argument("text")
-
-    subparsers.add_parser("check")
+    ask_parser.add_argument("--engine", choices=ENGINES, default="prolog")
+    ask_parser.add_argument("--limit", type=int)
+    ask_parser.add_argument("--offset", type=int, default=0)
+
+    ask_batch_parser = subparsers.add_parser("ask-batch")
+    ask_batch_parser.add_argument("questions", type=argparse.FileType("r"))
+    ask_batch_parser.add_argument("--engine", choices=ENGINES, default="prolog")
+    ask_batch_parser.add_argument("--limit", type=int)
+    ask_batch_parser.add_argument("--offset", type=int, default=0)
+
+    check_parser = subparsers.add_parser("check")
+    check_parser.add_argument("--audit", action="store_true")
+    check_parser.add_argument("--json", action="store_true")
     subparsers.add_parser("export-prolog")
+    subparsers.add_parser("compact")
+    subparsers.add_parser("migrate")
+    subparsers.add_parser("snapshot")
     return parser
 
 
@@ -31,8 +66,18 @@ def main(
     extractor: OpenAIExtractor | None = None,
 ) -> int:
     args = build_parser().parse_args(argv)
-    store = KnowledgeStore(args.store_dir)
+    store = open_store(args.store_dir, args.store_backend, fsync=args.fsync)
+    try:
+        return _run(args, store, extractor)
+    finally:
+        store.close()
 
+
+def _run(
+    args: argparse.Namespace,
+    store: KnowledgeStore,
+    extractor: OpenAIExtractor | None,
+) -> int:
     if args.command == "add":
         extractor = extractor or OpenAIExtractor()
         interactive = args.interactive and not args.noninteractive
@@ -41,11 +86,34 @@ def main(
             store=store,
             extractor=extractor,
             interactive=interactive,
+            projection=args.projection,
         )
         for claim in result.accepted:
             print(f"accepted: {claim.s} {claim.p} {claim.o}")
         for claim in result.quarantined:
             print(f"quarantined: {claim.s} {claim.p} {claim.o}")
+        for claim in result.duplicates:
+            print(f"duplicate: {claim.s} {claim.p} {claim.o}")
+        for conflict in result.conflicts:
+            print(f"conflict: {conflict.message}")
+        for issue in result.invalid:
+            print(f"invalid: {issue.message}")
+        return 2 if result.quarantined or result.invalid else 0
+
+    if args.command == "import":
+        with args.extractions as handle:
+            items = [json.loads(line) for line in handle if line.strip()]
+        result = import_extractions(
+            (parse_extraction_response(item, item.get("text", "")) for item in items),
+            store=store,
+            workers=args.workers,
+            projection=args.projection,
+        )
+        print(
+            f"imported: {len(result.accepted)} accepted, "
+            f"{len(result.quarantined)} quarantined, "
+            f"{len(result.duplicates)} duplicates"
+        )
         for conflict in result.conflicts:
             print(f"conflict: {conflict.message}")
         for issue in result.invalid:
@@ -54,19 +122,101 @@ def main(
 
     if args.command == "ask":
         extractor = extractor or OpenAIExtractor()
-        result = ask_knowledge(args.text, store=store, extractor=extractor)
+        result = ask_knowledge(
+            args.text,
+            store=store,
+            extractor=extractor,
+            engine=args.engine,
+            limit=args.limit,
+            offset=args.offset,
+            projection=args.projection,
+        )
         print(result.answer)
         for claim in result.evidence:
             print(f"evidence: {claim.s} {claim.p} {claim.o} ({claim.id})")
+        for binding in result.bindings:
+            values = " ".join(
+                f"{name}={value}" for name, value in binding.values.items()
+            )
+            print(f"binding: {values} ({binding.evidence.id})", flush=True)
+        return 0
+
+    if args.command == "ask-batch":
+        extractor = extractor or OpenAIExtractor()
+        with args.questions as handle:
+            questions = [line.strip() for line in handle if line.strip()]
+        results = ask_many(
+            questions,
+            store=store,
+            extractor=extractor,
+            engine=args.engine,
+            limit=args.limit,
+            offset=args.offset,
+            projection=args.projection,
+        )
+        for question, result in zip(questions, results):
+            bindings = list(result.bindings)
+            evidence = [*result.evidence, *(binding.evidence for binding in bindings)]
+            record = {
+                "question": question,
+                "answer": result.answer,
+                "evidence": [claim.id for claim in evidence],
+                "bindings": [binding.values for binding in bindings],
+                "query": {
+                    "s": result.query.s,
+                    "p": result.query.p,
+                    "o": result.query.o,
+                    "polarity": result.query.polarity,
+                },
+            }
+            print(json.dumps(record), flush=True)
         return 0
 
     if args.command == "check":
-        result = check_knowledge(store)
-        print(result.message)
-        return 0 if result.ok else 1
+        result = check_knowledge(store, args.projection)
+        if not args.audit:
+            print(result.message)
+            return 0 if result.ok else 1
+        report = audit_knowledge(store)
+        if args.json:
+            print(json.dumps({"world": result.message, **report.to_dict()}))
+        else:
+            print(result.message)
+            print(
+                f"audit: {report.claims} accepted claims, "
+                f"{len(report.contradictions)} contradictions, "
+                f"{len(report.functional_violations)} functional violations"
+            )
+            for item in report.contradictions:
+                ids = ", ".join([*item.asserted, *item.denied])
+                print(f"contradiction: {item.s} {item.p} {item.o} ({ids})")
+            for item in report.functional_violations:
+                values = " ".join(
+                    f"{value}=({', '.join(ids)})" for value, ids in item.values.items()
+                )
+                print(f"functional: {item.s} {item.p} {values}")
+        return 0 if result.ok and report.ok else 1
 
     if args.command == "export-prolog":
-        print(export_prolog(store))
+        write_prolog(store, sys.stdout, args.projection)
+        return 0
+
+    if args.command == "compact":
+        print(f"compacted {compact_knowledge(store)} records")
+        return 0
+
+    if args.command == "migrate":
+        if args.store_backend == "jsonl":
+            print("migrate requires --store-backend sqlite or --store-backend sharded")
+            return 1
+        print(f"migrated {store.migrate_from_jsonl()} records")
+        return 0
+
+    if args.command == "snapshot":
+        if args.store_backend == "sqlite":
+            print("snapshot is not needed for --store-backend sqlite")
+            return 1
+        print(f"wrote {snapshot_knowledge(store)}")
         return 0
 
     raise ValueError(f"Unknown command: {args.command}")
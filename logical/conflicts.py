@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import dataclass
+from typing import Callable, Iterable
 
 from logical.schema import ClaimRecord, ConstraintRecord, KnowledgeStatus
 
 
+ClaimLoader = Callable[[str | None, str | None, str | None], Iterable[ClaimRecord]]
+
+
 @dataclass(frozen=True)
 class Conflict:
     kind: str
@@ -13,63 +18,174 @@ class Conflict:
     message: str
 
 
-def find_conflicts(
-    candidate: ClaimRecord,
-    existing_claims: list[ClaimRecord],
-    constraints: list[ConstraintRecord],
-) -> list[Conflict]:
-    conflicts: list[Conflict] = []
-    for existing in existing_claims:
-        if existing.status is not KnowledgeStatus.ACCEPTED:
-            continue
-        if _is_direct_contradiction(candidate, existing):
-            conflicts.append(
-                Conflict(
-                    kind="direct_contradiction",
-                    candidate_claim_id=candidate.id,
-                    existing_claim_id=existing.id,
-                    message=(
-                        f"{candidate.s} {candidate.p} {candidate.o} contradicts "
-                        f"accepted claim {existing.id}"
-                    ),
-                )
-            )
-        if _violates_functional_constraint(candidate, existing, constraints):
-            conflicts.append(
-                Conflict(
-                    kind="functional_for_subject",
-                    candidate_claim_id=candidate.id,
-                    existing_claim_id=existing.id,
-                    message=(
-                        f"{candidate.s} {candidate.p} can only have one value; "
-                        f"{existing.o} is already accepted"
-                    ),
-                )
+class ConflictIndex:
+    def __init__(
+        self,
+        constraints: Iterable[ConstraintRecord] = (),
+        load: ClaimLoader | None = None,
+    ) -> None:
+        self.functional: set[tuple[str, str]] = set()
+        self.cardinality: dict[tuple[str, str], int] = {}
+        self.inverse_functional: set[str] = set()
+        self.symmetric: set[str] = set()
+        self.inverses: dict[str, set[str]] = defaultdict(set)
+        self.disjoint: dict[str, set[str]] = defaultdict(set)
+        self.load = load
+        self.loaded: set[tuple[str | None, str | None, str | None]] = set()
+        self.removed: set[str] = set()
+        self.claims: dict[int, ClaimRecord] = {}
+        self.rows: dict[str, list[int]] = defaultdict(list)
+        self.positive: dict[tuple[str, str], dict[int, str]] = defaultdict(dict)
+        self.subjects: dict[tuple[str, str], dict[int, str]] = defaultdict(dict)
+        self.by_spo: dict[tuple[str, str, str, bool], set[int]] = defaultdict(set)
+        self.next_row = 0
+        for constraint in constraints:
+            self.add_constraint(constraint)
+
+    def add_constraint(self, constraint: ConstraintRecord) -> None:
+        kind = constraint.kind
+        if kind == "functional_for_subject":
+            self.functional.add((constraint.s, constraint.p))
+        elif kind == "max_cardinality":
+            key = (constraint.s, constraint.p)
+            limit = int(constraint.o)
+            self.cardinality[key] = min(limit, self.cardinality.get(key, limit))
+        elif kind == "inverse_functional":
+            self.inverse_functional.add(constraint.p)
+        elif kind == "symmetric":
+            self.symmetric.add(constraint.p)
+        elif kind == "inverse_of":
+            self.inverses[constraint.p].add(constraint.o)
+            self.inverses[constraint.o].add(constraint.p)
+        elif kind == "disjoint_values":
+            self.disjoint[constraint.p].add(constraint.o)
+            self.disjoint[constraint.o].add(constraint.p)
+
+    def add_claims(self, claims: Iterable[ClaimRecord]) -> None:
+        for claim in claims:
+            self.add_claim(claim)
+
+    def add_claim(self, claim: ClaimRecord) -> None:
+        if claim.status is not KnowledgeStatus.ACCEPTED:
+            return
+        row = self.next_row
+        self.next_row += 1
+        self.claims[row] = claim
+        self.rows[claim.id].append(row)
+        if claim.polarity:
+            self.positive[(claim.s, claim.p)][row] = claim.o
+            self.subjects[(claim.p, claim.o)][row] = claim.s
+        self.by_spo[(claim.s, claim.p, claim.o, claim.polarity)].add(row)
+
+    def remove_claims(self, claim_ids: Iterable[str]) -> None:
+        for claim_id in claim_ids:
+            self.removed.add(claim_id)
+            for row in self.rows.pop(claim_id, []):
+                claim = self.claims.pop(row)
+                self.positive[(claim.s, claim.p)].pop(row, None)
+                self.subjects[(claim.p, claim.o)].pop(row, None)
+                self.by_spo[(claim.s, claim.p, claim.o, claim.polarity)].discard(row)
+
+    def matching(self, candidate: ClaimRecord) -> list[ClaimRecord]:
+        s, p, o = candidate.s, candidate.p, candidate.o
+        self._load(s, p, None)
+        rows = self.by_spo.get((s, p, o, candidate.polarity), ())
+        return [self.claims[row] for row in sorted(rows)]
+
+    def conflicts(self, candidate: ClaimRecord) -> list[Conflict]:
+        s, p, o, polarity = candidate.s, candidate.p, candidate.o, candidate.polarity
+        key = (s, p)
+        self._load(s, p, None)
+        found = self._tagged("direct_contradiction", s, p, o, not polarity)
+        if polarity and (key in self.functional or key in self.cardinality):
+            values = self.positive.get(key, {})
+            others = {row: value for row, value in values.items() if value != o}
+            if key in self.functional:
+                found.extend((row, "functional_for_subject") for row in others)
+            limit = self.cardinality.get(key)
+            if limit is not None and len(set(others.values())) >= limit:
+                found.extend((row, "max_cardinality") for row in others)
+        if polarity and p in self.inverse_functional:
+            self._load(None, p, o)
+            subjects = self.subjects.get((p, o), {})
+            found.extend(
+                (row, "inverse_functional")
+                for row, subject in subjects.items()
+                if subject != s
             )
-    return conflicts
+        for other in sorted(self.disjoint.get(p, ())) if polarity else ():
+            self._load(s, other, None)
+            found.extend(self._tagged("disjoint_values", s, other, o, True))
+        if p in self.symmetric and o != s:
+            self._load(o, p, None)
+            found.extend(self._tagged("symmetric", o, p, s, not polarity))
+        for other in sorted(self.inverses.get(p, ())):
+            self._load(o, other, None)
+            found.extend(self._tagged("inverse_of", o, other, s, not polarity))
+        found.sort()
+        return [
+            _conflict(kind, candidate, self.claims[row], self.cardinality.get(key))
+            for row, kind in found
+        ]
 
+    def _tagged(
+        self, kind: str, s: str, p: str, o: str, polarity: bool
+    ) -> list[tuple[int, str]]:
+        return [(row, kind) for row in self.by_spo.get((s, p, o, polarity), ())]
 
-def _is_direct_contradiction(candidate: ClaimRecord, existing: ClaimRecord) -> bool:
-    return (
-        candidate.s == existing.s
-        and candidate.p == existing.p
-        and candidate.o == existing.o
-        and candidate.polarity != existing.polarity
-    )
+    def _load(self, s: str | None, p: str | None, o: str | None) -> None:
+        if self.load is None or (s, p, o) in self.loaded:
+            return
+        self.loaded.add((s, p, o))
+        for claim in self.load(s, p, o):
+            if claim.id not in self.rows and claim.id not in self.removed:
+                self.add_claim(claim)
 
 
-def _violates_functional_constraint(
+def find_conflicts(
     candidate: ClaimRecord,
-    existing: ClaimRecord,
+    existing_claims: list[ClaimRecord],
     constraints: list[ConstraintRecord],
-) -> bool:
-    if not candidate.polarity or not existing.polarity:
-        return False
-    if candidate.s != existing.s or candidate.p != existing.p or candidate.o == existing.o:
-        return False
-    return any(
-        constraint.kind == "functional_for_subject"
-        and constraint.s == candidate.s
-        and constraint.p == candidate.p
-        for constraint in constraints
+) -> list[Conflict]:
+    index = ConflictIndex(constraints)
+    index.add_claims(existing_claims)
+    return index.conflicts(candidate)
+
+
+def _conflict(
+    kind: str, candidate: ClaimRecord, existing: ClaimRecord, limit: int | None
+) -> Conflict:
+    triple = f"{candidate.s} {candidate.p} {candidate.o}"
+    if kind == "direct_contradiction":
+        message = f"{triple} contradicts accepted claim {existing.id}"
+    elif kind == "functional_for_subject":
+        message = (
+            f"{candidate.s} {candidate.p} can only have one value; "
+            f"{existing.o} is already accepted"
+        )
+    elif kind == "max_cardinality":
+        message = (
+            f"{candidate.s} {candidate.p} can have at most {limit} values; "
+            f"{existing.o} is already accepted"
+        )
+    elif kind == "inverse_functional":
+        message = (
+            f"{candidate.p} {candidate.o} can only belong to one subject; "
+            f"{existing.s} already has it"
+        )
+    elif kind == "disjoint_values":
+        message = (
+            f"{candidate.s} cannot have {candidate.o} for both {candidate.p} "
+            f"and {existing.p}"
+        )
+    else:
+        message = (
+            f"{triple} contradicts accepted claim {existing.id} "
+            f"({existing.s} {existing.p} {existing.o}) through {kind}"
+        )
+    return Conflict(
+        kind=kind,
+        candidate_claim_id=candidate.id,
+        existing_claim_id=existing.id,
+        message=message,
     )
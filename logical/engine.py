@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from collections import defaultdict, deque
+from typing import Iterator
+
+from logical.schema import ClaimRecord, KnowledgeStatus, QueryIntent, is_variable
+from logical.snapshot import KnowledgeSnapshot
+
+
+ENGINES = ("prolog", "native")
+
+
+class NativeEngine:
+    def __init__(self, snapshot: KnowledgeSnapshot) -> None:
+        self.snapshot = snapshot
+        self.aliases = snapshot.alias_index()
+        constraints = [
+            self.aliases.canonical_constraint(constraint)
+            for constraint in snapshot.constraints()
+        ]
+        self.functional = {
+            (constraint.s, constraint.p)
+            for constraint in constraints
+            if constraint.kind == "functional_for_subject"
+        }
+        self.transitive = {
+            constraint.p
+            for constraint in constraints
+            if constraint.kind == "transitive"
+        }
+        self.mirrors: dict[str, set[str]] = defaultdict(set)
+        for constraint in constraints:
+            if constraint.kind == "symmetric":
+                self.mirrors[constraint.p].add(constraint.p)
+            elif constraint.kind == "inverse_of":
+                self.mirrors[constraint.p].add(constraint.o)
+                self.mirrors[constraint.o].add(constraint.p)
+        self._closures: dict[tuple[str, str], dict[str, ClaimRecord]] = {}
+
+    def answer(self, query: QueryIntent) -> tuple[str, list[ClaimRecord]]:
+        query = self.aliases.canonical_query(query)
+        evidence = list(self._claims(query.s, query.p, query.o))
+        if any(claim.polarity == query.polarity for claim in evidence):
+            return "true", evidence
+        if evidence:
+            return "false", evidence
+        mirrored = [
+            claim
+            for other in sorted(self.mirrors.get(query.p, ()))
+            for claim in self._claims(query.o, other, query.s)
+        ]
+        if any(claim.polarity == query.polarity for claim in mirrored):
+            return "true", mirrored
+        if mirrored:
+            return "false", mirrored
+        if query.p in self.transitive and query.o in self.closure(query.s, query.p):
+            hops = [
+                claim
+                for claim in self._edges(query.s, query.p)
+                if claim.o == query.o or query.o in self.closure(claim.o, query.p)
+            ]
+            return ("true" if query.polarity else "false"), hops
+        if (query.s, query.p) in self.functional:
+            others = [
+                claim
+                for claim in self._claims(query.s, query.p, None)
+                if claim.polarity and claim.o != query.o
+            ]
+            if others:
+                return ("false" if query.polarity else "true"), others
+        return "unknown", []
+
+    def closure(self, subject: str, predicate: str) -> dict[str, ClaimRecord]:
+        key = (subject, predicate)
+        if key in self._closures:
+            return self._closures[key]
+        reached: dict[str, ClaimRecord] = {}
+        pending: deque[str] = deque()
+        for claim in self._edges(subject, predicate):
+            if claim.o not in reached:
+                reached[claim.o] = claim
+                pending.append(claim.o)
+        while pending:
+            node = pending.popleft()
+            known = self._closures.get((node, predicate))
+            if known is not None:
+                for target in known:
+                    reached.setdefault(target, reached[node])
+                continue
+            for claim in self._edges(node, predicate):
+                if claim.o not in reached:
+                    reached[claim.o] = reached[node]
+                    pending.append(claim.o)
+        self._closures[key] = reached
+        return reached
+
+    def solutions(
+        self, query: QueryIntent
+    ) -> Iterator[tuple[dict[str, str], ClaimRecord]]:
+        query = self.aliases.canonical_query(query)
+        terms = (query.s, query.p, query.o)
+        pattern = [None if is_variable(term) else term for term in terms]
+        for claim in self._claims(*pattern):
+            if claim.polarity == query.polarity:
+                binding = _bind(terms, (claim.s, claim.p, claim.o))
+                if binding is not None:
+                    yield binding, claim
+        if not query.polarity:
+            return
+        for s, p, o, claim in self._inferred(*pattern):
+            binding = _bind(terms, (s, p, o))
+            if binding is not None:
+                yield binding, claim
+
+    def _inferred(
+        self, s: str | None, p: str | None, o: str | None
+    ) -> Iterator[tuple[str, str, str, ClaimRecord]]:
+        predicates = sorted(self.transitive) if p is None else [p]
+        for predicate in predicates:
+            if predicate not in self.transitive:
+                continue
+            if s is not None:
+                subjects = [s]
+            elif o is not None:
+                subjects = self._sources(predicate, o)
+            else:
+                subjects = list(
+                    dict.fromkeys(claim.s for claim in self._edges(None, predicate))
+                )
+            for subject in subjects:
+                for target, claim in self.closure(subject, predicate).items():
+                    if o is not None and target != o:
+                        continue
+                    if next(self._edges(subject, predicate, target), None) is not None:
+                        continue
+                    yield subject, predicate, target, claim
+
+    def _sources(self, predicate: str, target: str) -> list[str]:
+        seen: dict[str, None] = {}
+        pending = deque([target])
+        while pending:
+            node = pending.popleft()
+            for claim in self._claims(None, predicate, node):
+                if claim.polarity and claim.s not in seen:
+                    seen[claim.s] = None
+                    pending.append(claim.s)
+        return list(seen)
+
+    def _edges(
+        self, subject: str | None, predicate: str, target: str | None = None
+    ) -> Iterator[ClaimRecord]:
+        claims = self._claims(subject, predicate, target)
+        return (claim for claim in claims if claim.polarity)
+
+    def _claims(
+        self, s: str | None, p: str | None, o: str | None
+    ) -> Iterator[ClaimRecord]:
+        status = KnowledgeStatus.ACCEPTED
+        if not self.aliases:
+            yield from self.snapshot.iter_claims(s, p, o, status)
+            return
+        for spelling in self.aliases.spellings(s, p, o):
+            for claim in self.snapshot.iter_claims(*spelling, status):
+                yield self.aliases.canonical_view(claim)
+
+
+def _bind(terms: tuple[str, str, str], values: tuple[str, str, str]) -> dict | None:
+    binding: dict[str, str] = {}
+    for term, value in zip(terms, values):
+        if is_variable(term) and binding.setdefault(term[1:], value) != value:
+            return None
+        if not is_variable(term) and term != value:
+            return None
+    return binding
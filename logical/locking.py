@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import fcntl
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Iterator
+
+
+@contextmanager
+def file_lock(path: str | Path) -> Iterator[None]:
+    descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(descriptor, fcntl.LOCK_UN)
+        os.close(descriptor)
+
+
+class GroupCommit:
+    def __init__(self, write: Callable[[list[str]], None], delay: float = 0.0) -> None:
+        self.write = write
+        self.delay = delay
+        self._condition = threading.Condition()
+        self._pending: list[str] = []
+        self._queued = 0
+        self._committed = 0
+        self._leader = False
+        self._failures: dict[tuple[int, int], tuple[BaseException, set[int]]] = {}
+
+    def submit(self, lines: list[str]) -> None:
+        with self._condition:
+            self._pending.extend(lines)
+            self._queued += 1
+            ticket = self._queued
+            while self._committed < ticket:
+                if self._leader:
+                    self._condition.wait()
+                    continue
+                self._lead()
+            for (first, last), (error, waiting) in list(self._failures.items()):
+                if first <= ticket <= last:
+                    waiting.discard(ticket)
+                    if not waiting:
+                        del self._failures[(first, last)]
+                    raise RuntimeError("group commit failed") from error
+
+    def _lead(self) -> None:
+        self._leader = True
+        self._condition.release()
+        try:
+            if self.delay:
+                time.sleep(self.delay)
+        finally:
+            self._condition.acquire()
+        first = self._committed + 1
+        last = self._queued
+        lines, self._pending = self._pending, []
+        failure: BaseException | None = None
+        self._condition.release()
+        try:
+            self.write(lines)
+        except BaseException as error:
+            failure = error
+        finally:
+            self._condition.acquire()
+        if failure is not None:
+            self._failures[(first, last)] = (failure, set(range(first, last + 1)))
+        self._leader = False
+        self._committed = last
+        self._condition.notify_all()
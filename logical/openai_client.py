@@ -59,14 +59,23 @@ EXTRACTION_SCHEMA: dict[str, Any] = {
             "items": {
                 "type": "object",
                 "additionalProperties": False,
-                "required": ["kind", "s", "p"],
+                "required": ["kind", "s", "p", "o"],
                 "properties": {
                     "kind": {
                         "type": "string",
-                        "enum": ["functional_for_subject"],
+                        "enum": [
+                            "functional_for_subject",
+                            "transitive",
+                            "max_cardinality",
+                            "inverse_functional",
+                            "symmetric",
+                            "inverse_of",
+                            "disjoint_values",
+                        ],
                     },
                     "s": {"type": "string"},
                     "p": {"type": "string"},
+                    "o": {"type": "string"},
                 },
             },
         },
@@ -97,7 +106,15 @@ class OpenAIExtractor:
             "Extract RDF-like logical knowledge. Return only structured JSON. "
             "Use concise canonical terms. Represent unary facts as s=subject, "
             "p=predicate, o=true. For functional constraints such as one color, "
-            "emit kind=functional_for_subject for the subject and predicate."
+            "emit kind=functional_for_subject for the subject and predicate. For "
+            "hierarchical predicates that chain, such as is_a or part_of, emit "
+            "kind=transitive with the predicate and any subject. Use "
+            "max_cardinality with o=N for a subject and predicate that allow at "
+            "most N values, inverse_functional when an object identifies one "
+            "subject, symmetric for relations such as married_to, inverse_of with "
+            "o=the other predicate for pairs such as parent_of and child_of, and "
+            "disjoint_values with o=the other predicate when both can never share "
+            "a value. Leave o empty otherwise."
         )
         response = self._responses_json(
             system,
@@ -110,7 +127,9 @@ class OpenAIExtractor:
     def extract_query(self, text: str) -> QueryIntent:
         system = (
             "Convert the user question into one RDF-like triple query. Return only "
-            "structured JSON with s, p, o, and polarity."
+            "structured JSON with s, p, o, and polarity. Use a variable such as "
+            "?x for any position the question asks about, for example "
+            "s=sky, p=color, o=?color for 'what color is the sky?'."
         )
         response = self._responses_json(system, text, "logical_query", QUERY_SCHEMA)
         return parse_query_response(response)
@@ -163,6 +182,7 @@ def parse_extraction_response(
             kind=item.get("kind", ""),
             s=item.get("s", ""),
             p=item.get("p", ""),
+            o=item.get("o", ""),
             source_claim_id="",
         )
         for item in payload.get("constraints", [])
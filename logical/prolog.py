@@ -1,16 +1,59 @@
 from __future__ import annotations
 
+import atexit
 from dataclasses import dataclass
+from itertools import groupby
+from operator import itemgetter
+import os
 from pathlib import Path
 import re
+import select
 import shutil
 import subprocess
+import threading
+import time
+from typing import Iterable, Iterator
 
-from logical.schema import ClaimRecord, ConstraintRecord, KnowledgeStatus, QueryIntent
+from logical.schema import (
+    ClaimRecord,
+    ConstraintRecord,
+    KnowledgeStatus,
+    QueryIntent,
+    is_variable,
+)
 
 
 SAFE_ATOM = re.compile(r"^[a-z][a-z0-9_]*$")
 
+PROJECTIONS = ("triples", "partitioned")
+
+PREDICATE_FACTS = ("transitive", "inverse_functional", "symmetric")
+PAIRED_FACTS = ("inverse_of", "disjoint_values")
+CONSTRAINT_PREDICATES = (
+    "max_cardinality/3",
+    *(f"{name}/1" for name in PREDICATE_FACTS),
+    *(f"{name}/2" for name in PAIRED_FACTS),
+)
+
+ANSWER_VALUES = "[Result|Evidence]"
+
+WORKER_GOAL = (
+    "prompt(_, ''), repeat, read_term(user_input, Request, []), "
+    "( Request == end_of_file -> halt "
+    "; Request = consult(File) -> catch((consult(File), Reply = ok), _, Reply = error) "
+    "; Request = ask(Goal) -> "
+    "catch((call(Goal) -> Reply = true ; Reply = false), _, Reply = error) "
+    "; Request = solve(Goal, Values) -> "
+    "catch((call(Goal) -> atomic_list_concat([yes|Values], '\\t', Reply) "
+    "; Reply = no), _, Reply = error) "
+    "; Request = solutions(Goal, Values, Limit, Offset) -> "
+    "catch((findall(Line, (limit(Limit, offset(Offset, Goal)), "
+    "atomic_list_concat(Values, '\\t', Line)), Lines), "
+    "atomic_list_concat([rows|Lines], '\\x1e\\', Reply)), _, Reply = error) "
+    "; Reply = error ), "
+    "writeln(Reply), flush_output, fail"
+)
+
 
 @dataclass(frozen=True)
 class PrologCheckResult:
@@ -19,39 +62,169 @@ class PrologCheckResult:
 
 
 def project_world(
-    claims: list[ClaimRecord], constraints: list[ConstraintRecord]
+    claims: Iterable[ClaimRecord],
+    constraints: Iterable[ConstraintRecord],
+    projection: str = "triples",
 ) -> str:
-    lines = [
-        "% Generated by logical. Do not edit by hand.",
-        ":- discontiguous triple/3.",
-        ":- discontiguous neg_triple/3.",
-        ":- discontiguous functional_for_subject/2.",
-        "",
-    ]
-    for claim in claims:
-        if claim.status is not KnowledgeStatus.ACCEPTED:
-            continue
-        predicate = "triple" if claim.polarity else "neg_triple"
-        lines.append(
-            f"{predicate}({atom(claim.s)},{atom(claim.p)},{atom(claim.o)})."
-        )
+    return project_triples(
+        (
+            (claim.s, claim.p, claim.o, claim.polarity, claim.id)
+            for claim in claims
+            if claim.status is KnowledgeStatus.ACCEPTED
+        ),
+        constraints,
+        projection,
+    )
+
+
+def project_triples(
+    triples: Iterable[tuple[str, str, str, bool] | tuple[str, str, str, bool, str]],
+    constraints: Iterable[ConstraintRecord],
+    projection: str = "triples",
+) -> str:
+    if projection == "partitioned":
+        triples = sorted(triples, key=itemgetter(1))
+    lines = iter_world_lines(triples, constraints, projection)
+    return "".join(line + "\n" for line in lines)
+
+
+def iter_world_lines(
+    triples: Iterable[tuple[str, str, str, bool] | tuple[str, str, str, bool, str]],
+    constraints: Iterable[ConstraintRecord],
+    projection: str = "triples",
+) -> Iterator[str]:
+    if projection not in PROJECTIONS:
+        raise ValueError(f"Unsupported projection: {projection}")
+    yield "% Generated by logical. Do not edit by hand."
+    yield ":- discontiguous triple/3."
+    yield ":- discontiguous neg_triple/3."
+    yield ":- discontiguous functional_for_subject/2."
+    yield ":- discontiguous claim_id/4."
+    for declaration in CONSTRAINT_PREDICATES:
+        yield f":- dynamic {declaration}."
+        yield f":- discontiguous {declaration}."
+    yield ":- table closure/3."
+    yield ""
+    if projection == "partitioned":
+        yield from iter_partitioned_fact_lines(triples, constraints)
+    else:
+        yield from iter_fact_lines(triples, constraints)
+    yield ""
+    yield "contradiction(S,P,O) :- triple(S,P,O), neg_triple(S,P,O)."
+    yield (
+        "functional_conflict(S,P,O1,O2) :- functional_for_subject(S,P), "
+        "triple(S,P,O1), triple(S,P,O2), O1 \\= O2."
+    )
+    yield "answer(S,P,O,true,true) :- triple(S,P,O), !."
+    yield "answer(S,P,O,true,false) :- neg_triple(S,P,O), !."
+    yield "answer(S,P,O,false,true) :- neg_triple(S,P,O), !."
+    yield "answer(S,P,O,false,false) :- triple(S,P,O), !."
+    yield "answer(S,P,O,true,true) :- mirrored(S,P,O), !."
+    yield "answer(S,P,O,true,false) :- mirrored_neg(S,P,O), !."
+    yield "answer(S,P,O,false,true) :- mirrored_neg(S,P,O), !."
+    yield "answer(S,P,O,false,false) :- mirrored(S,P,O), !."
+    yield "answer(S,P,O,true,true) :- closure(S,P,O), !."
+    yield "answer(S,P,O,false,false) :- closure(S,P,O), !."
+    yield "answer(S,P,O,true,false) :- other_functional_value(S,P,O), !."
+    yield "answer(S,P,O,false,true) :- other_functional_value(S,P,O), !."
+    yield "answer(_,_,_,_,unknown)."
+    yield (
+        "other_functional_value(S,P,O) :- functional_for_subject(S,P), "
+        "triple(S,P,O2), O2 \\= O."
+    )
+    yield "evidence(S,P,O,Id) :- claim_id(Id,S,P,O)."
+    yield (
+        "evidence(S,P,O,Id) :- \\+ claim_id(_,S,P,O), functional_for_subject(S,P), "
+        "triple(S,P,O2), O2 \\= O, claim_id(Id,S,P,O2)."
+    )
+    yield (
+        "evidence(S,P,O,Id) :- \\+ claim_id(_,S,P,O), transitive(P), "
+        "triple(S,P,M), (M == O -> true ; closure(M,P,O)), claim_id(Id,S,P,M)."
+    )
+    yield (
+        "evidence(S,P,O,Id) :- \\+ claim_id(_,S,P,O), mirror(P,Q), "
+        "claim_id(Id,O,Q,S)."
+    )
+    yield "mirror(P,P) :- symmetric(P)."
+    yield "mirror(P,Q) :- inverse_of(P,Q)."
+    yield "mirror(P,Q) :- inverse_of(Q,P)."
+    yield "mirrored(S,P,O) :- mirror(P,Q), triple(O,Q,S)."
+    yield "mirrored_neg(S,P,O) :- mirror(P,Q), neg_triple(O,Q,S)."
+    yield "closure(S,P,O) :- transitive(P), triple(S,P,O)."
+    yield "closure(S,P,O) :- closure(S,P,M), triple(M,P,O)."
+    yield (
+        "inferred(S,P,O,Id) :- closure(S,P,O), \\+ triple(S,P,O), "
+        "once(evidence(S,P,O,Id))."
+    )
+    yield (
+        "cardinality_conflict(S,P,N,Count) :- max_cardinality(S,P,N), "
+        "aggregate_all(set(O), triple(S,P,O), Values), length(Values, Count), "
+        "Count > N."
+    )
+    yield (
+        "inverse_functional_conflict(S1,P,O,S2) :- inverse_functional(P), "
+        "triple(S1,P,O), triple(S2,P,O), S1 \\= S2."
+    )
+    yield "mirror_conflict(S,P,O,Q) :- mirror(P,Q), triple(S,P,O), neg_triple(O,Q,S)."
+    yield "disjoint(P,Q) :- disjoint_values(P,Q)."
+    yield "disjoint(P,Q) :- disjoint_values(Q,P)."
+    yield (
+        "disjoint_conflict(S,P,Q,O) :- disjoint(P,Q), triple(S,P,O), "
+        "triple(S,Q,O)."
+    )
+
+
+def iter_fact_lines(
+    triples: Iterable[tuple[str, str, str, bool] | tuple[str, str, str, bool, str]],
+    constraints: Iterable[ConstraintRecord],
+) -> Iterator[str]:
+    for s, p, o, polarity, *claim_id in triples:
+        predicate = "triple" if polarity else "neg_triple"
+        terms = f"{atom(s)},{atom(p)},{atom(o)}"
+        yield f"{predicate}({terms})."
+        if claim_id:
+            yield f"claim_id({atom(claim_id[0])},{terms})."
     for constraint in constraints:
         if constraint.kind == "functional_for_subject":
-            lines.append(
-                f"functional_for_subject({atom(constraint.s)},{atom(constraint.p)})."
-            )
-    lines.extend(
-        [
-            "",
-            "contradiction(S,P,O) :- triple(S,P,O), neg_triple(S,P,O).",
-            (
-                "functional_conflict(S,P,O1,O2) :- functional_for_subject(S,P), "
-                "triple(S,P,O1), triple(S,P,O2), O1 \\= O2."
-            ),
-            "",
-        ]
-    )
-    return "\n".join(lines)
+            yield f"functional_for_subject({atom(constraint.s)},{atom(constraint.p)})."
+        elif constraint.kind == "max_cardinality":
+            limit = int(constraint.o)
+            yield f"max_cardinality({atom(constraint.s)},{atom(constraint.p)},{limit})."
+        elif constraint.kind in PREDICATE_FACTS:
+            yield f"{constraint.kind}({atom(constraint.p)})."
+        elif constraint.kind in PAIRED_FACTS:
+            terms = f"{atom(constraint.p)},{atom(constraint.o)}"
+            yield f"{constraint.kind}({terms})."
+
+
+def iter_partitioned_fact_lines(
+    triples: Iterable[tuple[str, str, str, bool] | tuple[str, str, str, bool, str]],
+    constraints: Iterable[ConstraintRecord],
+) -> Iterator[str]:
+    for p, group in groupby(triples, key=itemgetter(1)):
+        relation: list[tuple[str, str]] = []
+        negatives: list[tuple[str, str, str, bool]] = []
+        claim_ids: list[tuple[str, str, str]] = []
+        for s, _, o, polarity, *claim_id in group:
+            if polarity:
+                relation.append((s, o))
+            else:
+                negatives.append((s, p, o, False))
+            if claim_id:
+                claim_ids.append((s, o, claim_id[0]))
+        if relation:
+            name = relation_predicate(p)
+            yield f"triple(S,{atom(p)},O) :- {name}(S,O)."
+            for s, o in sorted(relation):
+                yield f"{name}({atom(s)},{atom(o)})."
+        yield from iter_fact_lines(sorted(negatives), ())
+        for s, o, claim_id in sorted(claim_ids):
+            yield f"claim_id({atom(claim_id)},{atom(s)},{atom(p)},{atom(o)})."
+    yield from iter_fact_lines((), constraints)
+
+
+def relation_predicate(predicate: str) -> str:
+    return atom("p_" + predicate)
 
 
 def atom(value: str) -> str:
@@ -60,9 +233,69 @@ def atom(value: str) -> str:
     return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
 
 
-def query_for_intent(intent: QueryIntent) -> str:
-    predicate = "triple" if intent.polarity else "neg_triple"
-    return f"{predicate}({atom(intent.s)},{atom(intent.p)},{atom(intent.o)})"
+def query_for_intent(intent: QueryIntent, projection: str = "triples") -> str:
+    terms = ",".join(_query_term(term) for term in (intent.s, intent.p, intent.o))
+    if intent.variables:
+        if not intent.polarity:
+            return f"neg_triple({terms}), claim_id(Id,{terms})"
+        if projection == "partitioned" and not is_variable(intent.p):
+            relation = relation_predicate(intent.p)
+            pair = f"{_query_term(intent.s)},{_query_term(intent.o)}"
+            direct = (
+                f"current_predicate({relation}/2), {relation}({pair}), "
+                f"claim_id(Id,{terms})"
+            )
+        else:
+            direct = f"triple({terms}), claim_id(Id,{terms})"
+        return f"({direct} ; inferred({terms},Id))"
+    polarity = "true" if intent.polarity else "false"
+    return (
+        f"answer({terms},{polarity},Result), "
+        f"findall(Id, evidence({terms},Id), Evidence)"
+    )
+
+
+def values_for_intent(intent: QueryIntent) -> str:
+    if not intent.variables:
+        return ANSWER_VALUES
+    return "[" + ",".join([*map(variable, intent.variables), "Id"]) + "]"
+
+
+def variable(name: str) -> str:
+    return "V_" + name
+
+
+def compile_world(world_path: str | Path) -> Path | None:
+    world_path = Path(world_path)
+    qlf_path = world_path.with_suffix(".qlf")
+    key_path = _qlf_key_path(qlf_path)
+    key_path.unlink(missing_ok=True)
+    swipl = shutil.which("swipl")
+    if swipl is None:
+        return None
+    result = subprocess.run(
+        [swipl, "-q", "-g", f"qcompile({atom(str(world_path))})", "-t", "halt"],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0 or result.stderr.strip() or not qlf_path.exists():
+        qlf_path.unlink(missing_ok=True)
+        return None
+    key_path.write_text(_world_stamp(world_path), encoding="utf-8")
+    return qlf_path
+
+
+def loadable_world(world_path: str | Path) -> Path:
+    world_path = Path(world_path)
+    qlf_path = world_path.with_suffix(".qlf")
+    try:
+        key = _qlf_key_path(qlf_path).read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return world_path
+    if qlf_path.exists() and key == _world_stamp(world_path):
+        return qlf_path
+    return world_path
 
 
 def validate_with_swipl(world_path: str | Path) -> PrologCheckResult:
@@ -73,7 +306,7 @@ def validate_with_swipl(world_path: str | Path) -> PrologCheckResult:
             message="ok (swipl not installed; syntax validation skipped)",
         )
     result = subprocess.run(
-        [swipl, "-q", "-t", "halt", "-s", str(world_path)],
+        [swipl, "-q", "-t", "halt", "-s", str(loadable_world(world_path))],
         capture_output=True,
         text=True,
         check=False,
@@ -91,7 +324,7 @@ def run_swipl_query(world_path: str | Path, query: str) -> bool:
         raise RuntimeError("swipl is not installed")
     goal = f"(({query}) -> writeln(true); writeln(false)), halt."
     result = subprocess.run(
-        [swipl, "-q", "-s", str(world_path), "-g", goal],
+        [swipl, "-q", "-s", str(loadable_world(world_path)), "-g", goal],
         capture_output=True,
         text=True,
         check=False,
@@ -99,3 +332,147 @@ def run_swipl_query(world_path: str | Path, query: str) -> bool:
     if result.returncode != 0:
         raise RuntimeError((result.stderr or result.stdout).strip())
     return result.stdout.strip().splitlines()[-1] == "true"
+
+
+class PrologWorker:
+    def __init__(
+        self,
+        executable: str | None = None,
+        timeout: float = 10.0,
+        consult_timeout: float | None = None,
+    ) -> None:
+        self.executable = executable
+        self.timeout = timeout
+        self.consult_timeout = consult_timeout
+        self._process: subprocess.Popen | None = None
+        self._buffer = b""
+        self._world: tuple | None = None
+        self._lock = threading.Lock()
+
+    def ask(self, world_path: str | Path, query: str) -> bool:
+        reply = self._call(world_path, f"ask(({query}))")
+        if reply == "error":
+            raise RuntimeError(f"swipl could not evaluate {query}")
+        return reply == "true"
+
+    def solve(self, world_path: str | Path, goal: str, values: str) -> list[str] | None:
+        reply = self._call(world_path, f"solve(({goal}), {values})")
+        if reply == "error":
+            raise RuntimeError(f"swipl could not evaluate {goal}")
+        if reply == "no":
+            return None
+        return reply.split("\t")[1:]
+
+    def solutions(
+        self,
+        world_path: str | Path,
+        goal: str,
+        values: str,
+        limit: int,
+        offset: int = 0,
+    ) -> list[list[str]]:
+        reply = self._call(
+            world_path, f"solutions(({goal}), {values}, {limit}, {offset})"
+        )
+        if reply == "error":
+            raise RuntimeError(f"swipl could not evaluate {goal}")
+        return [row.split("\t") for row in reply.split("\x1e")[1:]]
+
+    def close(self) -> None:
+        process, self._process = self._process, None
+        self._buffer = b""
+        self._world = None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+            process.wait()
+        process.stdout.close()
+
+    def _call(self, world_path: str | Path, request: str) -> str:
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+            world = _world_version(Path(world_path))
+            if world != self._world:
+                source = loadable_world(world_path)
+                consult = f"consult({atom(str(source))})"
+                if self._request(consult, self.consult_timeout) != "ok":
+                    raise RuntimeError(f"swipl could not consult {world_path}")
+                self._world = world
+            return self._request(request, self.timeout)
+
+    def _start(self) -> None:
+        self.close()
+        swipl = self.executable or shutil.which("swipl")
+        if swipl is None:
+            raise RuntimeError("swipl is not installed")
+        self._process = subprocess.Popen(
+            [swipl, "-q", "-g", WORKER_GOAL, "-t", "halt"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def _request(self, request: str, timeout: float | None) -> str:
+        try:
+            self._process.stdin.write(request.encode("utf-8") + b".\n")
+            self._process.stdin.flush()
+            return self._read_line(timeout)
+        except (OSError, RuntimeError):
+            self._process.kill()
+            self.close()
+            raise RuntimeError(f"swipl worker failed on {request}") from None
+
+    def _read_line(self, timeout: float | None) -> str:
+        descriptor = self._process.stdout.fileno()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if (remaining is not None and remaining <= 0) or not select.select(
+                [descriptor], [], [], remaining
+            )[0]:
+                raise RuntimeError("swipl worker timed out")
+            chunk = os.read(descriptor, 4096)
+            if not chunk:
+                raise RuntimeError("swipl worker exited")
+            self._buffer += chunk
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line.decode("utf-8").strip()
+
+
+_shared_worker: PrologWorker | None = None
+
+
+def shared_worker() -> PrologWorker:
+    global _shared_worker
+    if _shared_worker is None:
+        _shared_worker = PrologWorker()
+        atexit.register(_shared_worker.close)
+    return _shared_worker
+
+
+def _query_term(term: str) -> str:
+    return variable(term[1:]) if is_variable(term) else atom(term)
+
+
+def _qlf_key_path(qlf_path: Path) -> Path:
+    return qlf_path.with_name(qlf_path.name + ".key")
+
+
+def _world_stamp(path: Path) -> str:
+    stat = path.stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def _world_version(world_path: Path) -> tuple[str, int, int]:
+    stat = world_path.stat()
+    generation_path = world_path.with_suffix(".generation")
+    try:
+        generation = generation_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        generation = ""
+    return generation, stat.st_mtime_ns, stat.st_size
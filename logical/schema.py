@@ -3,15 +3,17 @@ from __future__ import annotations
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
+import hashlib
 import re
 from typing import Any
-from uuid import uuid4
 
 
 class RecordType(str, Enum):
     CLAIM = "claim"
     ALIAS = "alias"
     CONSTRAINT = "constraint"
+    STATUS = "status"
+    SOURCE = "source"
 
 
 class KnowledgeStatus(str, Enum):
@@ -19,12 +21,18 @@ class KnowledgeStatus(str, Enum):
     QUARANTINED = "quarantined"
 
 
+RECORD_FORMAT_VERSION = 2
+RECORD_TYPES = {record_type.value: record_type for record_type in RecordType}
+STATUSES = {status.value: status for status in KnowledgeStatus}
+
+
 def utc_now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def new_id(prefix: str) -> str:
-    return f"{prefix}-{uuid4().hex}"
+def claim_id_for(s: str, p: str, o: str, polarity: bool) -> str:
+    key = "\x1f".join((s, p, o, "1" if polarity else "0"))
+    return "claim-" + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
 
 
 def normalize_term(value: Any) -> str:
@@ -44,7 +52,7 @@ class ClaimRecord:
     p: str
     o: str
     source_text: str
-    id: str = field(default_factory=lambda: new_id("claim"))
+    id: str = ""
     polarity: bool = True
     confidence: float = 1.0
     status: KnowledgeStatus = KnowledgeStatus.ACCEPTED
@@ -56,6 +64,8 @@ class ClaimRecord:
         self.p = normalize_term(self.p)
         self.o = normalize_term(self.o)
         self.status = KnowledgeStatus(self.status)
+        if not self.id:
+            self.id = claim_id_for(self.s, self.p, self.o, self.polarity)
 
 
 @dataclass
@@ -86,6 +96,25 @@ class ConstraintRecord:
         self.o = normalize_term(self.o) if self.o else ""
 
 
+@dataclass
+class StatusRecord:
+    claim_id: str
+    status: KnowledgeStatus
+    created_at: str = field(default_factory=utc_now)
+    type: RecordType = field(default=RecordType.STATUS, init=False)
+
+    def __post_init__(self) -> None:
+        self.status = KnowledgeStatus(self.status)
+
+
+@dataclass
+class SourceRecord:
+    claim_id: str
+    source_text: str
+    created_at: str = field(default_factory=utc_now)
+    type: RecordType = field(default=RecordType.SOURCE, init=False)
+
+
 @dataclass
 class ExtractionResult:
     claims: list[ClaimRecord] = field(default_factory=list)
@@ -95,32 +124,95 @@ class ExtractionResult:
 
 @dataclass
 class QueryIntent:
-    s: str
-    p: str
-    o: str
+    s: str | None
+    p: str | None
+    o: str | None
     polarity: bool = True
 
     def __post_init__(self) -> None:
-        self.s = normalize_term(self.s)
-        self.p = normalize_term(self.p)
-        self.o = normalize_term(self.o)
+        self.s = _query_term(self.s, "s")
+        self.p = _query_term(self.p, "p")
+        self.o = _query_term(self.o, "o")
+
+    @property
+    def variables(self) -> list[str]:
+        names: list[str] = []
+        for term in (self.s, self.p, self.o):
+            if is_variable(term) and term[1:] not in names:
+                names.append(term[1:])
+        return names
+
+
+def is_variable(term: str) -> bool:
+    return term.startswith("?")
+
+
+def _query_term(value: Any, position: str) -> str:
+    if value is None:
+        return "?" + position
+    text = str(value).strip()
+    if text.startswith("?"):
+        return "?" + (normalize_term(text[1:]) if text[1:].strip() else position)
+    return normalize_term(text)
 
 
-def record_to_dict(record: ClaimRecord | AliasRecord | ConstraintRecord) -> dict[str, Any]:
+def record_to_dict(
+    record: ClaimRecord | AliasRecord | ConstraintRecord | StatusRecord | SourceRecord,
+) -> dict[str, Any]:
     data = asdict(record)
     data["type"] = record.type.value
+    data["v"] = RECORD_FORMAT_VERSION
     if "status" in data:
         data["status"] = KnowledgeStatus(data["status"]).value
     return data
 
 
-def record_from_dict(data: dict[str, Any]) -> ClaimRecord | AliasRecord | ConstraintRecord:
+def record_from_dict(
+    data: dict[str, Any],
+) -> ClaimRecord | AliasRecord | ConstraintRecord | StatusRecord | SourceRecord:
     record_type = RecordType(data["type"])
-    payload = {key: value for key, value in data.items() if key != "type"}
+    payload = {
+        key: value for key, value in data.items() if key not in {"type", "v"}
+    }
     if record_type is RecordType.CLAIM:
         return ClaimRecord(**payload)
     if record_type is RecordType.ALIAS:
         return AliasRecord(**payload)
     if record_type is RecordType.CONSTRAINT:
         return ConstraintRecord(**payload)
+    if record_type is RecordType.STATUS:
+        return StatusRecord(**payload)
+    if record_type is RecordType.SOURCE:
+        return SourceRecord(**payload)
     raise ValueError(f"Unsupported record type: {record_type}")
+
+
+def record_from_stored(
+    data: dict[str, Any],
+) -> ClaimRecord | AliasRecord | ConstraintRecord | StatusRecord | SourceRecord:
+    if data.get("v") != RECORD_FORMAT_VERSION:
+        return record_from_dict(data)
+    del data["v"]
+    record_class = RECORD_CLASSES[RECORD_TYPES[data.pop("type")]]
+    if "status" in data:
+        data["status"] = STATUSES[data["status"]]
+    return trusted_record(record_class, data)
+
+
+def trusted_record(record_class: type, fields: dict[str, Any]) -> Any:
+    record = record_class.__new__(record_class)
+    record.__dict__ = fields
+    return record
+
+
+KnowledgeRecord = (
+    ClaimRecord | AliasRecord | ConstraintRecord | StatusRecord | SourceRecord
+)
+
+RECORD_CLASSES = {
+    RecordType.CLAIM: ClaimRecord,
+    RecordType.ALIAS: AliasRecord,
+    RecordType.CONSTRAINT: ConstraintRecord,
+    RecordType.STATUS: StatusRecord,
+    RecordType.SOURCE: SourceRecord,
+}
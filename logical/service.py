@@ -1,27 +1,74 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain, islice
+import json
+from multiprocessing import get_all_start_methods, get_context
+from operator import itemgetter
+import os
+from pathlib import Path
 import sys
+from typing import Callable, Iterable, Iterator, TextIO
 
-from logical.conflicts import Conflict, find_conflicts
+from logical.aliases import AliasIndex
+from logical.audit import AuditReport, audit_snapshot
+from logical.conflicts import Conflict, ConflictIndex
+from logical.engine import NativeEngine
 from logical.openai_client import OpenAIExtractor
 from logical.prolog import (
-    project_world,
+    compile_world,
+    iter_fact_lines,
+    iter_world_lines,
+    project_triples,
     query_for_intent,
-    run_swipl_query,
+    shared_worker,
     validate_with_swipl,
+    values_for_intent,
 )
-from logical.schema import ClaimRecord, ExtractionResult, KnowledgeStatus, QueryIntent
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    ExtractionResult,
+    KnowledgeStatus,
+    QueryIntent,
+    RecordType,
+    SourceRecord,
+    StatusRecord,
+)
+from logical.sharded_store import ShardedSnapshot
+from logical.snapshot import KnowledgeSnapshot
 from logical.store import KnowledgeStore
 from logical.validation import ValidationIssue, validate_claim, validate_constraint
 
 
+BINDINGS_PAGE = 1000
+PARALLEL_IMPORT_CLAIMS = 10_000
+LOCAL_CONSTRAINTS = {"functional_for_subject", "max_cardinality"}
+COUPLED_CONSTRAINTS = {
+    "inverse_functional",
+    "symmetric",
+    "inverse_of",
+    "disjoint_values",
+}
+
+
 @dataclass
 class AddResult:
     accepted: list[ClaimRecord]
     quarantined: list[ClaimRecord]
     conflicts: list[Conflict]
     invalid: list[ValidationIssue]
+    duplicates: list[ClaimRecord] = field(default_factory=list)
+
+
+@dataclass
+class Binding:
+    values: dict[str, str]
+    evidence: ClaimRecord
 
 
 @dataclass
@@ -29,6 +76,7 @@ class AskResult:
     answer: str
     evidence: list[ClaimRecord]
     query: QueryIntent
+    bindings: Iterable[Binding] = ()
 
 
 @dataclass
@@ -42,6 +90,7 @@ def add_knowledge(
     store: KnowledgeStore | None = None,
     extractor: OpenAIExtractor | None = None,
     interactive: bool | None = None,
+    projection: str = "triples",
 ) -> AddResult:
     store = store or KnowledgeStore()
     extractor = extractor or OpenAIExtractor()
@@ -49,7 +98,7 @@ def add_knowledge(
 
     extraction = extractor.extract_knowledge(text)
     result = add_extraction(extraction, store, interactive=interactive)
-    rebuild_world(store)
+    rebuild_world(store, projection)
     return result
 
 
@@ -57,12 +106,11 @@ def add_extraction(
     extraction: ExtractionResult,
     store: KnowledgeStore,
     interactive: bool = False,
+    workers: int | None = None,
 ) -> AddResult:
-    accepted: list[ClaimRecord] = []
-    quarantined: list[ClaimRecord] = []
-    conflicts: list[Conflict] = []
     invalid: list[ValidationIssue] = []
-    existing_claims = store.load_claims(status=KnowledgeStatus.ACCEPTED)
+    snapshot = store.snapshot()
+    aliases = AliasIndex(snapshot.aliases() + extraction.aliases)
     valid_constraints = []
     for constraint in extraction.constraints:
         issues = validate_constraint(constraint)
@@ -70,117 +118,362 @@ def add_extraction(
             invalid.extend(issues)
         else:
             valid_constraints.append(constraint)
-    constraints = store.load_constraints() + valid_constraints
-
-    for claim in extraction.claims:
-        validation_issues = validate_claim(claim)
-        if validation_issues:
-            claim.status = KnowledgeStatus.QUARANTINED
-            quarantined.append(claim)
-            invalid.extend(validation_issues)
-            continue
-        claim_conflicts = find_conflicts(claim, existing_claims + accepted, constraints)
-        if claim_conflicts:
-            decision = _conflict_decision(claim, claim_conflicts, interactive)
-            if decision == "replace":
-                replaced_ids = {
-                    conflict.existing_claim_id for conflict in claim_conflicts
-                }
-                _quarantine_existing(
-                    store,
-                    replaced_ids,
-                )
-                existing_claims = [
-                    existing
-                    for existing in existing_claims
-                    if existing.id not in replaced_ids
-                ]
-                accepted.append(claim)
-            else:
-                claim.status = KnowledgeStatus.QUARANTINED
-                quarantined.append(claim)
-            conflicts.extend(claim_conflicts)
-        else:
-            accepted.append(claim)
+    constraints = [
+        aliases.canonical_constraint(constraint)
+        for constraint in snapshot.constraints() + valid_constraints
+    ]
+    claims = list(enumerate(map(aliases.canonical_claim, extraction.claims)))
+
+    if interactive or workers is None or workers < 2:
+        load = partial(_accepted_claims, snapshot, aliases)
+        resolution = _resolve_claims(
+            claims,
+            ConflictIndex(constraints, load=load),
+            snapshot.claim,
+            snapshot.sources_for,
+            interactive,
+        )
+    else:
+        resolution = _resolve_in_parallel(
+            claims, snapshot, aliases, constraints, workers
+        )
 
+    accepted = [claim for _, claim in resolution.accepted]
+    quarantined = [claim for _, claim in resolution.quarantined]
+    new_claims = [
+        claim
+        for claim in [*accepted, *quarantined]
+        if snapshot.claim(claim.id) is None
+    ]
+    status_changes = sorted(
+        [
+            *(
+                (position, StatusRecord(claim_id, KnowledgeStatus.QUARANTINED))
+                for position, claim_ids in resolution.replaced
+                for claim_id in claim_ids
+            ),
+            *(
+                (position, StatusRecord(claim_id, KnowledgeStatus.ACCEPTED))
+                for position, claim_id in resolution.restored
+            ),
+        ],
+        key=itemgetter(0),
+    )
     store.append_records(
-        [*extraction.aliases, *valid_constraints, *accepted, *quarantined]
+        [
+            *extraction.aliases,
+            *valid_constraints,
+            *new_claims,
+            *(source for _, source in resolution.provenance),
+            *(change for _, change in status_changes),
+        ]
     )
     return AddResult(
         accepted=accepted,
         quarantined=quarantined,
-        conflicts=conflicts,
-        invalid=invalid,
+        conflicts=[conflict for _, conflict in resolution.conflicts],
+        invalid=invalid + [issue for _, issue in resolution.invalid],
+        duplicates=[claim for _, claim in resolution.duplicates],
     )
 
 
+def import_extractions(
+    extractions: Iterable[ExtractionResult],
+    store: KnowledgeStore | None = None,
+    workers: int | None = None,
+    projection: str = "triples",
+) -> AddResult:
+    store = store or KnowledgeStore()
+    combined = ExtractionResult()
+    for extraction in extractions:
+        combined.claims.extend(extraction.claims)
+        combined.aliases.extend(extraction.aliases)
+        combined.constraints.extend(extraction.constraints)
+    result = add_extraction(combined, store, workers=workers)
+    rebuild_world(store, projection)
+    return result
+
+
 def ask_knowledge(
     text: str,
     store: KnowledgeStore | None = None,
     extractor: OpenAIExtractor | None = None,
+    engine: str = "prolog",
+    limit: int | None = None,
+    offset: int = 0,
+    projection: str = "triples",
 ) -> AskResult:
+    return next(
+        ask_many(
+            [text],
+            store=store,
+            extractor=extractor,
+            engine=engine,
+            limit=limit,
+            offset=offset,
+            projection=projection,
+        )
+    )
+
+
+def ask_many(
+    texts: Iterable[str],
+    store: KnowledgeStore | None = None,
+    extractor: OpenAIExtractor | None = None,
+    engine: str = "prolog",
+    limit: int | None = None,
+    offset: int = 0,
+    projection: str = "triples",
+) -> Iterator[AskResult]:
     store = store or KnowledgeStore()
     extractor = extractor or OpenAIExtractor()
-    query = extractor.extract_query(text)
-    rebuild_world(store)
-
-    answer = _ask_with_prolog_or_memory(store, query)
-    evidence = _evidence_for_query(store, query)
-    return AskResult(answer=answer, evidence=evidence, query=query)
+    if engine == "native":
+        ask = NativeEngine(store.snapshot()).answer
+        bindings = _native_bindings
+    elif engine == "prolog":
+        rebuild_world(store, projection)
+        ask = partial(_ask_with_prolog_or_memory, store)
+        bindings = partial(_prolog_bindings, projection=projection)
+    else:
+        raise ValueError(f"Unsupported engine: {engine}")
+    aliases = store.snapshot().alias_index()
+    for text in texts:
+        query = aliases.canonical_query(extractor.extract_query(text))
+        if not query.variables:
+            answer, evidence = ask(query)
+            yield AskResult(answer=answer, evidence=evidence, query=query)
+            continue
+        found = bindings(store, query, limit, offset)
+        first = next(found, None)
+        if first is None:
+            yield AskResult(answer="unknown", evidence=[], query=query)
+        else:
+            yield AskResult(
+                answer="true",
+                evidence=[],
+                query=query,
+                bindings=chain([first], found),
+            )
 
 
-def check_knowledge(store: KnowledgeStore | None = None) -> CheckResult:
+def find_bindings(
+    query: QueryIntent,
+    store: KnowledgeStore | None = None,
+    engine: str = "prolog",
+    limit: int | None = None,
+    offset: int = 0,
+    projection: str = "triples",
+) -> Iterator[Binding]:
     store = store or KnowledgeStore()
-    world_path = rebuild_world(store)
+    query = store.snapshot().alias_index().canonical_query(query)
+    if engine == "native":
+        return _native_bindings(store, query, limit, offset)
+    if engine == "prolog":
+        rebuild_world(store, projection)
+        return _prolog_bindings(store, query, limit, offset, projection)
+    raise ValueError(f"Unsupported engine: {engine}")
+
+
+def check_knowledge(
+    store: KnowledgeStore | None = None, projection: str = "triples"
+) -> CheckResult:
+    store = store or KnowledgeStore()
+    world_path = rebuild_world(store, projection)
     result = validate_with_swipl(world_path)
     return CheckResult(ok=result.ok, message=result.message)
 
 
-def export_prolog(store: KnowledgeStore | None = None) -> str:
+def audit_knowledge(store: KnowledgeStore | None = None) -> AuditReport:
+    store = store or KnowledgeStore()
+    return audit_snapshot(store.snapshot())
+
+
+def export_prolog(
+    store: KnowledgeStore | None = None, projection: str = "triples"
+) -> str:
+    store = store or KnowledgeStore()
+    snapshot = store.snapshot()
+    aliases = snapshot.alias_index()
+    return project_triples(
+        aliases.canonical_triples(snapshot.claim_triples(KnowledgeStatus.ACCEPTED)),
+        map(aliases.canonical_constraint, snapshot.constraints()),
+        projection,
+    )
+
+
+def write_prolog(
+    store: KnowledgeStore, handle: TextIO, projection: str = "triples"
+) -> None:
+    if projection == "partitioned":
+        lines = _partitioned_world_lines(store.snapshot())
+    else:
+        aliases = AliasIndex(store.iter_records(type=RecordType.ALIAS))
+        claims = store.iter_records(
+            type=RecordType.CLAIM, status=KnowledgeStatus.ACCEPTED
+        )
+        triples = aliases.canonical_triples(
+            (claim.s, claim.p, claim.o, claim.polarity, claim.id) for claim in claims
+        )
+        constraints = map(
+            aliases.canonical_constraint, store.iter_records(type=RecordType.CONSTRAINT)
+        )
+        lines = iter_world_lines(triples, constraints, projection)
+    for line in lines:
+        handle.write(line)
+        handle.write("\n")
+
+
+def compact_knowledge(store: KnowledgeStore | None = None) -> int:
+    store = store or KnowledgeStore()
+    return store.compact()
+
+
+def snapshot_knowledge(store: KnowledgeStore | None = None) -> str:
     store = store or KnowledgeStore()
-    return project_world(
-        store.load_claims(status=KnowledgeStatus.ACCEPTED),
-        store.load_constraints(),
+    return str(store.write_snapshot())
+
+
+def rebuild_world(store: KnowledgeStore, projection: str = "triples") -> str:
+    world_path = Path(store.world_path)
+    generation_path = world_path.with_suffix(".generation")
+    generation = {"projection": projection, "store": store.generation()}
+    built = _read_generation(generation_path) if world_path.exists() else None
+    if built == generation:
+        return str(world_path)
+    appended = None
+    if (
+        isinstance(built, dict)
+        and built.get("projection") == projection == "triples"
+        and "store" in built
+    ):
+        appended = store.records_since(built["store"])
+    if appended is not None and any(
+        isinstance(record, AliasRecord) for record in appended
+    ):
+        appended = None
+    generation_path.unlink(missing_ok=True)
+    if appended is None:
+        world_path = store.write_world(export_prolog(store, projection))
+        compile_world(world_path)
+    else:
+        _append_world(world_path, appended, store.snapshot().alias_index())
+    generation_path.write_text(json.dumps(generation), encoding="utf-8")
+    return str(world_path)
+
+
+def _partitioned_world_lines(snapshot: KnowledgeSnapshot) -> Iterator[str]:
+    aliases = snapshot.alias_index()
+    accepted = snapshot.claim_triples(KnowledgeStatus.ACCEPTED)
+    predicates = sorted({aliases.find(p) for _, p, *_ in accepted})
+    triples = (
+        (claim.s, claim.p, claim.o, claim.polarity, claim.id)
+        for p in predicates
+        for claim in _accepted_claims(snapshot, aliases, None, p, None)
     )
+    constraints = map(aliases.canonical_constraint, snapshot.constraints())
+    return iter_world_lines(triples, constraints, "partitioned")
 
 
-def rebuild_world(store: KnowledgeStore) -> str:
-    prolog_text = export_prolog(store)
-    return str(store.write_world(prolog_text))
+def _read_generation(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
 
 
-def _ask_with_prolog_or_memory(store: KnowledgeStore, query: QueryIntent) -> str:
+def _append_world(world_path: Path, records: list, aliases: AliasIndex) -> None:
+    triples = [
+        (
+            *aliases.canonical_triple(record.s, record.p, record.o),
+            record.polarity,
+            record.id,
+        )
+        for record in records
+        if isinstance(record, ClaimRecord)
+        and record.status == KnowledgeStatus.ACCEPTED
+    ]
+    constraints = [
+        aliases.canonical_constraint(record)
+        for record in records
+        if isinstance(record, ConstraintRecord)
+    ]
+    if not triples and not constraints:
+        return
+    with world_path.open("a", encoding="utf-8") as handle:
+        for line in iter_fact_lines(triples, constraints):
+            handle.write(line)
+            handle.write("\n")
+
+
+def _ask_with_prolog_or_memory(
+    store: KnowledgeStore, query: QueryIntent
+) -> tuple[str, list[ClaimRecord]]:
     try:
-        if run_swipl_query(store.world_path, query_for_intent(query)):
-            return "true"
-        negated = QueryIntent(
-            s=query.s,
-            p=query.p,
-            o=query.o,
-            polarity=not query.polarity,
+        values = shared_worker().solve(
+            store.world_path, query_for_intent(query), values_for_intent(query)
         )
-        if run_swipl_query(store.world_path, query_for_intent(negated)):
-            return "false"
-        return "unknown"
     except RuntimeError:
-        return _ask_in_memory(store, query)
+        values = None
+    if values is None:
+        return NativeEngine(store.snapshot()).answer(query)
+    answer, *claim_ids = values
+    snapshot = store.snapshot()
+    evidence = [snapshot.claim(claim_id) for claim_id in claim_ids]
+    return answer, [claim for claim in evidence if claim is not None]
 
 
-def _ask_in_memory(store: KnowledgeStore, query: QueryIntent) -> str:
-    claims = store.load_claims(status=KnowledgeStatus.ACCEPTED)
-    for claim in claims:
-        if (claim.s, claim.p, claim.o) == (query.s, query.p, query.o):
-            if claim.polarity == query.polarity:
-                return "true"
-            return "false"
-    return "unknown"
+def _native_bindings(
+    store: KnowledgeStore, query: QueryIntent, limit: int | None, offset: int
+) -> Iterator[Binding]:
+    solutions = NativeEngine(store.snapshot()).solutions(query)
+    stop = None if limit is None else offset + limit
+    for values, claim in islice(solutions, offset, stop):
+        yield Binding(values=values, evidence=claim)
 
 
-def _evidence_for_query(store: KnowledgeStore, query: QueryIntent) -> list[ClaimRecord]:
+def _prolog_bindings(
+    store: KnowledgeStore,
+    query: QueryIntent,
+    limit: int | None,
+    offset: int,
+    projection: str = "triples",
+) -> Iterator[Binding]:
+    worker = shared_worker()
+    goal = query_for_intent(query, projection)
+    values = values_for_intent(query)
+    snapshot = store.snapshot()
+    while limit is None or limit > 0:
+        size = BINDINGS_PAGE if limit is None else min(BINDINGS_PAGE, limit)
+        try:
+            rows = worker.solutions(store.world_path, goal, values, size, offset)
+        except RuntimeError:
+            yield from _native_bindings(store, query, limit, offset)
+            return
+        for *terms, claim_id in rows:
+            yield Binding(
+                values=dict(zip(query.variables, terms)),
+                evidence=snapshot.claim(claim_id),
+            )
+        if len(rows) < size:
+            return
+        offset += size
+        if limit is not None:
+            limit -= size
+
+
+def _accepted_claims(
+    snapshot: KnowledgeSnapshot,
+    aliases: AliasIndex,
+    s: str | None,
+    p: str | None,
+    o: str | None,
+) -> list[ClaimRecord]:
+    if not aliases:
+        return snapshot.find_claims(s, p, o, KnowledgeStatus.ACCEPTED)
     return [
-        claim
-        for claim in store.load_claims(status=KnowledgeStatus.ACCEPTED)
-        if (claim.s, claim.p, claim.o) == (query.s, query.p, query.o)
+        aliases.canonical_view(claim)
+        for spelling in aliases.spellings(s, p, o)
+        for claim in snapshot.iter_claims(*spelling, KnowledgeStatus.ACCEPTED)
     ]
 
 
@@ -198,9 +491,203 @@ def _conflict_decision(
     return "quarantine"
 
 
-def _quarantine_existing(store: KnowledgeStore, claim_ids: set[str]) -> None:
-    records = store.load_records()
-    for record in records:
-        if isinstance(record, ClaimRecord) and record.id in claim_ids:
-            record.status = KnowledgeStatus.QUARANTINED
-    store.rewrite_records(records)
+def _record_source(
+    claim: ClaimRecord,
+    existing: ClaimRecord,
+    sources_for: Callable[[str], list[str]],
+    provenance: list[tuple[int, SourceRecord]],
+    position: int,
+) -> None:
+    text = claim.source_text
+    if text == existing.source_text or text in sources_for(existing.id):
+        return
+    if any(
+        (source.claim_id, source.source_text) == (existing.id, text)
+        for _, source in provenance
+    ):
+        return
+    provenance.append(
+        (position, SourceRecord(claim_id=existing.id, source_text=text))
+    )
+
+
+@dataclass
+class _Resolution:
+    accepted: list[tuple[int, ClaimRecord]] = field(default_factory=list)
+    quarantined: list[tuple[int, ClaimRecord]] = field(default_factory=list)
+    conflicts: list[tuple[int, Conflict]] = field(default_factory=list)
+    invalid: list[tuple[int, ValidationIssue]] = field(default_factory=list)
+    duplicates: list[tuple[int, ClaimRecord]] = field(default_factory=list)
+    replaced: list[tuple[int, list[str]]] = field(default_factory=list)
+    restored: list[tuple[int, str]] = field(default_factory=list)
+    provenance: list[tuple[int, SourceRecord]] = field(default_factory=list)
+
+    def extend(self, other: _Resolution) -> None:
+        for name, items in vars(other).items():
+            getattr(self, name).extend(items)
+
+    def sort(self) -> None:
+        for items in vars(self).values():
+            items.sort(key=itemgetter(0))
+
+
+def _resolve_claims(
+    claims: Iterable[tuple[int, ClaimRecord]],
+    conflict_index: ConflictIndex,
+    stored_claim: Callable[[str], ClaimRecord | None],
+    sources_for: Callable[[str], list[str]],
+    interactive: bool = False,
+) -> _Resolution:
+    result = _Resolution()
+    batch: dict[str, ClaimRecord] = {}
+    replaced_ids: set[str] = set()
+    for position, claim in claims:
+        known = batch.get(claim.id)
+        stored = None if known else stored_claim(claim.id)
+        if (
+            stored is not None
+            and stored.status == KnowledgeStatus.ACCEPTED
+            and stored.id not in replaced_ids
+        ):
+            known = stored
+        elif known is None:
+            known = next(iter(conflict_index.matching(claim)), None)
+        if known is not None:
+            result.duplicates.append((position, claim))
+            _record_source(claim, known, sources_for, result.provenance, position)
+            continue
+        validation_issues = validate_claim(claim)
+        if validation_issues:
+            claim.status = KnowledgeStatus.QUARANTINED
+            result.quarantined.append((position, claim))
+            result.invalid.extend((position, issue) for issue in validation_issues)
+            batch[claim.id] = claim
+            continue
+        claim_conflicts = conflict_index.conflicts(claim)
+        if claim_conflicts:
+            decision = _conflict_decision(claim, claim_conflicts, interactive)
+            if decision == "replace":
+                claim_ids = {conflict.existing_claim_id for conflict in claim_conflicts}
+                result.replaced.append((position, sorted(claim_ids)))
+                replaced_ids.update(claim_ids)
+                conflict_index.remove_claims(claim_ids)
+                result.accepted.append((position, claim))
+                conflict_index.add_claim(claim)
+            else:
+                claim.status = KnowledgeStatus.QUARANTINED
+                result.quarantined.append((position, claim))
+            result.conflicts.extend(
+                (position, conflict) for conflict in claim_conflicts
+            )
+        else:
+            result.accepted.append((position, claim))
+            conflict_index.add_claim(claim)
+        batch[claim.id] = claim
+        if stored is not None:
+            if claim.status == KnowledgeStatus.ACCEPTED:
+                result.restored.append((position, claim.id))
+            _record_source(claim, stored, sources_for, result.provenance, position)
+    return result
+
+
+def _resolve_in_parallel(
+    claims: list[tuple[int, ClaimRecord]],
+    snapshot: KnowledgeSnapshot,
+    aliases: AliasIndex,
+    constraints: list[ConstraintRecord],
+    workers: int,
+) -> _Resolution:
+    coupled = _coupled_predicates(constraints)
+    partitions: dict[tuple[str, str], list[int]] = defaultdict(list)
+    sequential: list[tuple[int, ClaimRecord]] = []
+    for position, claim in claims:
+        if claim.p in coupled:
+            sequential.append((position, claim))
+        else:
+            partitions[(claim.s, claim.p)].append(position)
+    local: dict[tuple[str, str], list[ConstraintRecord]] = defaultdict(list)
+    for constraint in constraints:
+        if constraint.kind in LOCAL_CONSTRAINTS:
+            local[(constraint.s, constraint.p)].append(constraint)
+
+    result = _resolve_claims(
+        sequential,
+        ConflictIndex(constraints, load=partial(_accepted_claims, snapshot, aliases)),
+        snapshot.claim,
+        snapshot.sources_for,
+    )
+    state = (claims, snapshot, aliases, local)
+    groups = list(partitions.values())
+    if not _can_fork(snapshot, len(claims) - len(sequential)):
+        result.extend(_resolve_partitions(groups, state))
+        result.sort()
+        return result
+    global _forked_state
+    _forked_state = state
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("fork")
+        ) as pool:
+            jobs = [groups[index :: workers * 4] for index in range(workers * 4)]
+            for resolution in pool.map(_resolve_forked, [job for job in jobs if job]):
+                result.extend(_with_claims(resolution, claims))
+    finally:
+        _forked_state = None
+    result.sort()
+    return result
+
+
+def _resolve_partitions(groups: list[list[int]], state: tuple) -> _Resolution:
+    claims, snapshot, aliases, local = state
+    load = partial(_accepted_claims, snapshot, aliases)
+    result = _Resolution()
+    for positions in groups:
+        first = claims[positions[0]][1]
+        result.extend(
+            _resolve_claims(
+                (claims[position] for position in positions),
+                ConflictIndex(local.get((first.s, first.p), ()), load=load),
+                snapshot.claim,
+                snapshot.sources_for,
+            )
+        )
+    return result
+
+
+_forked_state: tuple | None = None
+
+
+def _resolve_forked(groups: list[list[int]]) -> _Resolution:
+    result = _resolve_partitions(groups, _forked_state)
+    for items in (result.accepted, result.quarantined, result.duplicates):
+        items[:] = [(position, None) for position, _ in items]
+    return result
+
+
+def _with_claims(
+    result: _Resolution, claims: list[tuple[int, ClaimRecord]]
+) -> _Resolution:
+    for items in (result.accepted, result.quarantined, result.duplicates):
+        items[:] = [claims[position] for position, _ in items]
+    for _, claim in result.quarantined:
+        claim.status = KnowledgeStatus.QUARANTINED
+    return result
+
+
+def _can_fork(snapshot: KnowledgeSnapshot, claims: int) -> bool:
+    return (
+        claims >= PARALLEL_IMPORT_CLAIMS
+        and (os.cpu_count() or 1) > 1
+        and "fork" in get_all_start_methods()
+        and isinstance(snapshot, (KnowledgeSnapshot, ShardedSnapshot))
+    )
+
+
+def _coupled_predicates(constraints: Iterable[ConstraintRecord]) -> set[str]:
+    coupled: set[str] = set()
+    for constraint in constraints:
+        if constraint.kind in COUPLED_CONSTRAINTS:
+            coupled.add(constraint.p)
+            if constraint.o:
+                coupled.add(constraint.o)
+    return coupled
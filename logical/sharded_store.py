@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+import zlib
+
+from logical.aliases import AliasIndex
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    KnowledgeRecord,
+    KnowledgeStatus,
+    RecordType,
+    SourceRecord,
+    StatusRecord,
+)
+from logical.snapshot import KnowledgeSnapshot, Record
+from logical.store import KnowledgeStore
+
+
+DEFAULT_SHARDS = 16
+PARALLEL_LOAD_BYTES = 8 * 1024 * 1024
+
+
+def shard_for_subject(subject: str, shard_count: int) -> int:
+    return zlib.crc32(subject.encode("utf-8")) % shard_count
+
+
+class ShardedKnowledgeStore:
+    def __init__(
+        self,
+        root: str | Path = ".logical",
+        shards: int | None = None,
+        fsync: bool = False,
+        workers: int | None = None,
+        parallel_load_bytes: int = PARALLEL_LOAD_BYTES,
+    ) -> None:
+        self.root = Path(root)
+        self.shards_path = self.root / "shards"
+        self.layout_path = self.shards_path / "layout.json"
+        self.knowledge_path = self.root / "knowledge.jsonl"
+        self.world_path = self.root / "world.pl"
+        self.workers = workers
+        self.parallel_load_bytes = parallel_load_bytes
+        self.shard_count = self._read_layout(shards)
+        self.shards = [
+            KnowledgeStore(self.shards_path / f"{index:02d}", fsync=fsync)
+            for index in range(self.shard_count)
+        ]
+
+    def ensure_root(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        if not self.layout_path.exists():
+            self.shards_path.mkdir(parents=True, exist_ok=True)
+            self.layout_path.write_text(
+                json.dumps({"shards": self.shard_count}), encoding="utf-8"
+            )
+
+    def shard_index(self, record: ClaimRecord | AliasRecord | ConstraintRecord) -> int:
+        subject = record.canonical if isinstance(record, AliasRecord) else record.s
+        return shard_for_subject(subject, self.shard_count)
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+
+    def append_records(self, records: Iterable[KnowledgeRecord]) -> None:
+        records = list(records)
+        batches: dict[int, list] = defaultdict(list)
+        routes = {
+            record.id: self.shard_index(record)
+            for record in records
+            if isinstance(record, ClaimRecord)
+        }
+        snapshot = None
+        for record in records:
+            if isinstance(record, (StatusRecord, SourceRecord)):
+                index = routes.get(record.claim_id)
+                if index is None:
+                    if snapshot is None:
+                        snapshot = self.snapshot()
+                    index = snapshot.shard_of(record.claim_id)
+                if index is None:
+                    raise ValueError(f"Unknown claim id: {record.claim_id}")
+            else:
+                index = self.shard_index(record)
+            batches[index].append(record)
+        if not batches:
+            return
+        self.ensure_root()
+        for index, batch in sorted(batches.items()):
+            self.shards[index].append_records(batch)
+
+    def iter_records(
+        self,
+        type: RecordType | None = None,
+        status: KnowledgeStatus | None = None,
+        subject: str | None = None,
+    ) -> Iterator[ClaimRecord | AliasRecord | ConstraintRecord]:
+        shards = self.shards
+        if subject is not None:
+            shards = [shards[shard_for_subject(subject, self.shard_count)]]
+        for shard in shards:
+            yield from shard.iter_records(type=type, status=status, subject=subject)
+
+    def update_status(self, claim_ids: Iterable[str], status: KnowledgeStatus) -> None:
+        self.append_records(
+            StatusRecord(claim_id=claim_id, status=status) for claim_id in claim_ids
+        )
+
+    def load_records(self) -> list[ClaimRecord | AliasRecord | ConstraintRecord]:
+        return self.snapshot().records
+
+    def load_claims(self, status: KnowledgeStatus | None = None) -> list[ClaimRecord]:
+        return self.snapshot().claims(status)
+
+    def load_aliases(self) -> list[AliasRecord]:
+        return self.snapshot().aliases()
+
+    def load_constraints(self) -> list[ConstraintRecord]:
+        return self.snapshot().constraints()
+
+    def snapshot(self) -> ShardedSnapshot:
+        self._load_in_parallel()
+        return ShardedSnapshot(self, [shard.snapshot() for shard in self.shards])
+
+    def generation(self) -> list[list[int]]:
+        self._load_in_parallel()
+        return [shard.generation() for shard in self.shards]
+
+    def records_since(self, generation: list) -> list[Record] | None:
+        if len(generation) != len(self.shards):
+            return None
+        records: list[Record] = []
+        for shard, shard_generation in zip(self.shards, generation):
+            shard_records = shard.records_since(shard_generation)
+            if shard_records is None:
+                return None
+            records.extend(shard_records)
+        return records
+
+    def write_world(self, prolog_text: str) -> Path:
+        self.ensure_root()
+        self.world_path.write_text(prolog_text, encoding="utf-8")
+        return self.world_path
+
+    def rewrite_records(
+        self, records: Iterable[ClaimRecord | AliasRecord | ConstraintRecord]
+    ) -> None:
+        self.ensure_root()
+        batches: list[list] = [[] for _ in self.shards]
+        for record in records:
+            batches[self.shard_index(record)].append(record)
+        for shard, batch in zip(self.shards, batches):
+            shard.rewrite_records(batch)
+
+    def compact(self) -> int:
+        return sum(
+            shard.compact() for shard in self.shards if shard.knowledge_path.exists()
+        )
+
+    def write_snapshot(self) -> Path:
+        for shard in self.shards:
+            if shard.knowledge_path.exists():
+                shard.write_snapshot()
+        return self.shards_path
+
+    def migrate_from_jsonl(self, source: KnowledgeStore | None = None) -> int:
+        source = source or KnowledgeStore(self.root)
+        if any(shard.knowledge_path.exists() for shard in self.shards):
+            raise RuntimeError(f"{self.shards_path} already contains shards")
+        records = source.load_records()
+        self.rewrite_records(records)
+        return len(records)
+
+    def _read_layout(self, shards: int | None) -> int:
+        if self.layout_path.exists():
+            stored = json.loads(self.layout_path.read_text(encoding="utf-8"))["shards"]
+            if shards is not None and shards != stored:
+                raise ValueError(
+                    f"{self.shards_path} has {stored} shards, not {shards}"
+                )
+            return stored
+        return shards or DEFAULT_SHARDS
+
+    def _load_in_parallel(self) -> None:
+        pending = [
+            shard
+            for shard in self.shards
+            if shard.watermark()[0] is None
+            and shard.knowledge_path.exists()
+            and not shard.snapshot_path.exists()
+        ]
+        workers = self.workers or os.cpu_count() or 1
+        total = sum(shard.knowledge_path.stat().st_size for shard in pending)
+        if workers < 2 or len(pending) < 2 or total < self.parallel_load_bytes:
+            return
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            results = pool.map(_load_shard, [shard.root for shard in pending])
+            for shard, (snapshot, watermark) in zip(pending, results):
+                shard.install_snapshot(snapshot, watermark)
+
+
+class ShardedSnapshot:
+    def __init__(
+        self, store: ShardedKnowledgeStore, snapshots: list[KnowledgeSnapshot]
+    ) -> None:
+        self.store = store
+        self.snapshots = snapshots
+
+    def __len__(self) -> int:
+        return sum(len(snapshot) for snapshot in self.snapshots)
+
+    @property
+    def records(self) -> list[ClaimRecord | AliasRecord | ConstraintRecord]:
+        return list(chain.from_iterable(snapshot.records for snapshot in self.snapshots))
+
+    def shard_of(self, claim_id: str) -> int | None:
+        for index, snapshot in enumerate(self.snapshots):
+            if snapshot.claim(claim_id) is not None:
+                return index
+        return None
+
+    def claims(self, status: KnowledgeStatus | None = None) -> list[ClaimRecord]:
+        return self.find_claims(status=status)
+
+    def aliases(self) -> list[AliasRecord]:
+        return list(chain.from_iterable(snapshot.aliases() for snapshot in self.snapshots))
+
+    def alias_index(self) -> AliasIndex:
+        return AliasIndex(self.aliases())
+
+    def constraints(self) -> list[ConstraintRecord]:
+        return list(
+            chain.from_iterable(snapshot.constraints() for snapshot in self.snapshots)
+        )
+
+    def sources_for(self, claim_id: str) -> list[str]:
+        index = self.shard_of(claim_id)
+        return [] if index is None else self.snapshots[index].sources_for(claim_id)
+
+    def claim(self, claim_id: str) -> ClaimRecord | None:
+        index = self.shard_of(claim_id)
+        return None if index is None else self.snapshots[index].claim(claim_id)
+
+    def find_claims(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> list[ClaimRecord]:
+        return list(self.iter_claims(s, p, o, status))
+
+    def iter_claims(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> Iterator[ClaimRecord]:
+        for snapshot in self._route(s):
+            yield from snapshot.iter_claims(s, p, o, status)
+
+    def triples(
+        self, status: KnowledgeStatus | None = None
+    ) -> Iterator[tuple[str, str, str, bool]]:
+        for snapshot in self.snapshots:
+            yield from snapshot.triples(status)
+
+    def claim_triples(
+        self, status: KnowledgeStatus | None = None
+    ) -> Iterator[tuple[str, str, str, bool, str]]:
+        for snapshot in self.snapshots:
+            yield from snapshot.claim_triples(status)
+
+    def _route(self, subject: str | None) -> list[KnowledgeSnapshot]:
+        if subject is None:
+            return self.snapshots
+        return [self.snapshots[shard_for_subject(subject, self.store.shard_count)]]
+
+
+def _load_shard(
+    root: Path,
+) -> tuple[KnowledgeSnapshot, tuple[int | None, int, int]]:
+    store = KnowledgeStore(root)
+    snapshot = store.snapshot()
+    return snapshot, store.watermark()
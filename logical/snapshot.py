@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+from array import array
+from collections import defaultdict
+from typing import TYPE_CHECKING, Iterable, Iterator
+
+from logical.aliases import AliasIndex
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    KnowledgeStatus,
+    RecordType,
+    SourceRecord,
+    StatusRecord,
+    trusted_record,
+)
+from logical.terms import STATUS_CODES, STATUSES, TermDictionary, TripleColumns
+
+if TYPE_CHECKING:
+    from logical.binary_snapshot import MappedSnapshot
+
+
+Record = ClaimRecord | AliasRecord | ConstraintRecord | SourceRecord
+
+RECORD_KINDS = {
+    RecordType.CLAIM: 0,
+    RecordType.ALIAS: 1,
+    RecordType.CONSTRAINT: 2,
+    RecordType.SOURCE: 3,
+}
+
+
+class KnowledgeSnapshot:
+    def __init__(
+        self, records: Iterable[Record] = (), base: MappedSnapshot | None = None
+    ) -> None:
+        self.base = base
+        self.base_rows = 0 if base is None else base.claim_count
+        self.base_status: dict[int, int] = {}
+        self.terms = TermDictionary(base)
+        self.columns = TripleColumns()
+        self.claim_ids: list[str] = []
+        self.source_texts: list[str] = []
+        self.confidences = array("d")
+        self.created_at: list[str] = []
+        self.alias_records: list[AliasRecord] = []
+        self.alias_terms = AliasIndex()
+        self.constraint_records: list[ConstraintRecord] = []
+        self.source_records: list[SourceRecord] = []
+        self.sources: dict[str, list[str]] = defaultdict(list)
+        self.kinds = array("B")
+        self.by_status: dict[int, set[int]] = defaultdict(set)
+        self.by_id: dict[str, int] = {}
+        self.by_spo: dict[tuple[int, int, int], list[int]] = defaultdict(list)
+        self.by_sp: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self.by_po: dict[tuple[int, int], list[int]] = defaultdict(list)
+        self.by_subject: dict[int, list[int]] = defaultdict(list)
+        self.by_predicate: dict[int, list[int]] = defaultdict(list)
+        self.status_changes = 0 if base is None else base.status_changes
+        if base is not None:
+            self._load_base_records(base)
+        self.extend(records)
+
+    def __len__(self) -> int:
+        return self.base_records + len(self.kinds)
+
+    @property
+    def base_records(self) -> int:
+        return 0 if self.base is None else self.base.record_count
+
+    @property
+    def claim_count(self) -> int:
+        return self.base_rows + len(self.columns)
+
+    @property
+    def records(self) -> list[Record]:
+        return self.records_since(0)
+
+    def records_since(self, index: int) -> list[Record]:
+        kinds = self.kinds.tobytes()
+        if self.base is not None:
+            kinds = bytes(self.base.record_kinds) + kinds
+        head = kinds[:index]
+        positions = [head.count(kind) for kind in range(len(RECORD_KINDS))]
+        sources = {
+            1: self.alias_records,
+            2: self.constraint_records,
+            3: self.source_records,
+        }
+        records: list[Record] = []
+        for kind in kinds[index:]:
+            position = positions[kind]
+            positions[kind] += 1
+            if kind == 0:
+                records.append(self._claim(position))
+            else:
+                records.append(sources[kind][position])
+        return records
+
+    def extend(self, records: Iterable[Record | StatusRecord]) -> None:
+        for record in records:
+            self.add(record)
+
+    def add(self, record: Record | StatusRecord) -> None:
+        if isinstance(record, StatusRecord):
+            self.apply_status(record)
+            return
+        self.kinds.append(RECORD_KINDS[record.type])
+        if isinstance(record, AliasRecord):
+            self.alias_records.append(record)
+            self.alias_terms.add(record)
+        elif isinstance(record, ConstraintRecord):
+            self.constraint_records.append(record)
+        elif isinstance(record, SourceRecord):
+            self._add_source(record)
+        else:
+            self._add_claim(record)
+
+    def apply_status(self, change: StatusRecord) -> None:
+        self.status_changes += 1
+        row = self._row_for_id(change.claim_id)
+        if row is None:
+            return
+        code = STATUS_CODES[change.status]
+        if row < self.base_rows:
+            self.base_status[row] = code
+            return
+        local = row - self.base_rows
+        self.by_status[self.columns.status[local]].discard(row)
+        self.columns.status[local] = code
+        self.by_status[code].add(row)
+
+    def claims(self, status: KnowledgeStatus | None = None) -> list[ClaimRecord]:
+        return self.find_claims(status=status)
+
+    def aliases(self) -> list[AliasRecord]:
+        return list(self.alias_records)
+
+    def alias_index(self) -> AliasIndex:
+        return self.alias_terms
+
+    def constraints(self) -> list[ConstraintRecord]:
+        return list(self.constraint_records)
+
+    def sources_for(self, claim_id: str) -> list[str]:
+        return list(self.sources.get(claim_id, []))
+
+    def claim(self, claim_id: str) -> ClaimRecord | None:
+        row = self._row_for_id(claim_id)
+        return None if row is None else self._claim(row)
+
+    def find_claims(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> list[ClaimRecord]:
+        return list(self.iter_claims(s, p, o, status))
+
+    def iter_claims(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> Iterator[ClaimRecord]:
+        for row in self.find_rows(s, p, o, status):
+            yield self._claim(row)
+
+    def find_rows(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> list[int]:
+        lookup = self.terms.lookup
+        s_id, p_id, o_id = (
+            None if term is None else lookup(term) for term in (s, p, o)
+        )
+        if (s is not None and s_id is None) or (p is not None and p_id is None):
+            return []
+        if o is not None and o_id is None:
+            return []
+        rows = self._base_rows(s_id, p_id, o_id)
+        if s_id is not None and p_id is not None and o_id is not None:
+            rows.extend(self.by_spo.get((s_id, p_id, o_id), []))
+        elif s_id is not None and p_id is not None:
+            rows.extend(self.by_sp.get((s_id, p_id), []))
+        elif s_id is not None:
+            rows.extend(self.by_subject.get(s_id, []))
+        elif p_id is not None and o_id is not None:
+            rows.extend(self.by_po.get((p_id, o_id), []))
+        elif p_id is not None:
+            rows.extend(self.by_predicate.get(p_id, []))
+        elif status is not None and self.base is None:
+            rows = sorted(self.by_status[STATUS_CODES[status]])
+        else:
+            rows.extend(range(self.base_rows, self.claim_count))
+        status_code = None if status is None else STATUS_CODES[status]
+        return [
+            row
+            for row in rows
+            if (o_id is None or self.triple_ids(row)[2] == o_id)
+            and (status_code is None or self.status_code(row) == status_code)
+        ]
+
+    def triple_ids(self, row: int) -> tuple[int, int, int, int]:
+        if row < self.base_rows:
+            base = self.base
+            return base.s[row], base.p[row], base.o[row], base.polarity[row]
+        local = row - self.base_rows
+        columns = self.columns
+        return (
+            columns.s[local],
+            columns.p[local],
+            columns.o[local],
+            columns.polarity[local],
+        )
+
+    def status_code(self, row: int) -> int:
+        if row < self.base_rows:
+            return self.base_status.get(row, self.base.status[row])
+        return self.columns.status[row - self.base_rows]
+
+    def triples(
+        self, status: KnowledgeStatus | None = None
+    ) -> Iterator[tuple[str, str, str, bool]]:
+        term = self.terms.term
+        for row in self.find_rows(status=status):
+            s_id, p_id, o_id, polarity = self.triple_ids(row)
+            yield term(s_id), term(p_id), term(o_id), bool(polarity)
+
+    def claim_triples(
+        self, status: KnowledgeStatus | None = None
+    ) -> Iterator[tuple[str, str, str, bool, str]]:
+        term = self.terms.term
+        for row in self.find_rows(status=status):
+            s_id, p_id, o_id, polarity = self.triple_ids(row)
+            yield term(s_id), term(p_id), term(o_id), bool(polarity), self.row_id(row)
+
+    def row_id(self, row: int) -> str:
+        if row < self.base_rows:
+            return self.base.claim_id(row)
+        return self.claim_ids[row - self.base_rows]
+
+    def close(self) -> None:
+        if self.base is not None:
+            self.base.close()
+
+    def _base_rows(
+        self, s_id: int | None, p_id: int | None, o_id: int | None
+    ) -> list[int]:
+        if self.base is None:
+            return []
+        if any(
+            term_id is not None and term_id >= self.base.term_count
+            for term_id in (s_id, p_id, o_id)
+        ):
+            return []
+        if s_id is None and p_id is None and o_id is None:
+            return list(range(self.base_rows))
+        return self.base.rows(s_id, p_id, o_id)
+
+    def _load_base_records(self, base: MappedSnapshot) -> None:
+        for offset in base.other_offsets:
+            record = base.read_record(offset)
+            if isinstance(record, AliasRecord):
+                self.alias_records.append(record)
+                self.alias_terms.add(record)
+            elif isinstance(record, SourceRecord):
+                self._add_source(record)
+            else:
+                self.constraint_records.append(record)
+
+    def _row_for_id(self, claim_id: str) -> int | None:
+        row = self.by_id.get(claim_id)
+        if row is None and self.base is not None:
+            row = self.base.claim_row(claim_id)
+        return row
+
+    def _add_source(self, record: SourceRecord) -> None:
+        self.source_records.append(record)
+        self.sources[record.claim_id].append(record.source_text)
+
+    def _add_claim(self, claim: ClaimRecord) -> None:
+        s_id = self.terms.intern(claim.s)
+        p_id = self.terms.intern(claim.p)
+        o_id = self.terms.intern(claim.o)
+        local = self.columns.append(s_id, p_id, o_id, claim.polarity, claim.status)
+        row = self.base_rows + local
+        self.claim_ids.append(claim.id)
+        self.source_texts.append(claim.source_text)
+        self.confidences.append(claim.confidence)
+        self.created_at.append(claim.created_at)
+        self.by_status[self.columns.status[local]].add(row)
+        self.by_id[claim.id] = row
+        self.by_spo[(s_id, p_id, o_id)].append(row)
+        self.by_sp[(s_id, p_id)].append(row)
+        self.by_po[(p_id, o_id)].append(row)
+        self.by_subject[s_id].append(row)
+        self.by_predicate[p_id].append(row)
+
+    def _claim(self, row: int) -> ClaimRecord:
+        if row < self.base_rows:
+            claim = self.base.read_claim(row)
+            claim.status = STATUSES[self.status_code(row)]
+            return claim
+        local = row - self.base_rows
+        term = self.terms.term
+        columns = self.columns
+        return trusted_record(
+            ClaimRecord,
+            {
+                "s": term(columns.s[local]),
+                "p": term(columns.p[local]),
+                "o": term(columns.o[local]),
+                "source_text": self.source_texts[local],
+                "id": self.claim_ids[local],
+                "polarity": bool(columns.polarity[local]),
+                "confidence": self.confidences[local],
+                "status": STATUSES[columns.status[local]],
+                "created_at": self.created_at[local],
+            },
+        )
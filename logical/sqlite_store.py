@@ -0,0 +1,434 @@
+from __future__ import annotations
+
+import heapq
+from pathlib import Path
+import sqlite3
+from typing import Iterable, Iterator
+
+from logical.aliases import AliasIndex
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    KnowledgeRecord,
+    KnowledgeStatus,
+    RecordType,
+    SourceRecord,
+    StatusRecord,
+)
+from logical.snapshot import Record
+from logical.store import KnowledgeStore
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS claims (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    s TEXT NOT NULL,
+    p TEXT NOT NULL,
+    o TEXT NOT NULL,
+    polarity INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    status TEXT NOT NULL,
+    source_text TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS claims_spo ON claims (s, p, o);
+CREATE INDEX IF NOT EXISTS claims_p ON claims (p);
+CREATE INDEX IF NOT EXISTS claims_status ON claims (status);
+CREATE TABLE IF NOT EXISTS aliases (
+    seq INTEGER PRIMARY KEY,
+    canonical TEXT NOT NULL,
+    alias TEXT NOT NULL,
+    source_claim_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS constraints (
+    seq INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    s TEXT NOT NULL,
+    p TEXT NOT NULL,
+    o TEXT NOT NULL,
+    source_claim_id TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS constraints_sp ON constraints (s, p);
+CREATE TABLE IF NOT EXISTS sources (
+    seq INTEGER PRIMARY KEY,
+    claim_id TEXT NOT NULL,
+    source_text TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sources_claim ON sources (claim_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+CLAIM_COLUMNS = "id, s, p, o, polarity, confidence, status, source_text, created_at"
+
+
+class SQLiteKnowledgeStore:
+    def __init__(self, root: str | Path = ".logical", fsync: bool = False) -> None:
+        self.root = Path(root)
+        self.fsync = fsync
+        self.database_path = self.root / "knowledge.sqlite3"
+        self.knowledge_path = self.root / "knowledge.jsonl"
+        self.world_path = self.root / "world.pl"
+        self._connection: sqlite3.Connection | None = None
+
+    def ensure_root(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.ensure_root()
+            self._connection = sqlite3.connect(self.database_path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "PRAGMA synchronous=" + ("FULL" if self.fsync else "NORMAL")
+            )
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def append_records(self, records: Iterable[KnowledgeRecord]) -> None:
+        records = list(records)
+        if not records:
+            return
+        with self.connection as connection:
+            self._insert(connection, records)
+
+    def iter_records(
+        self,
+        type: RecordType | None = None,
+        status: KnowledgeStatus | None = None,
+        subject: str | None = None,
+    ) -> Iterator[ClaimRecord | AliasRecord | ConstraintRecord]:
+        sources = []
+        if type in {None, RecordType.CLAIM}:
+            clauses = []
+            parameters: list[str] = []
+            if status is not None:
+                clauses.append("status = ?")
+                parameters.append(status.value)
+            if subject is not None:
+                clauses.append("s = ?")
+                parameters.append(subject)
+            sql = "SELECT seq, " + CLAIM_COLUMNS + " FROM claims"
+            if clauses:
+                sql += " WHERE " + " AND ".join(clauses)
+            sources.append(self._claim_rows(sql + " ORDER BY seq", tuple(parameters)))
+        if status is None and type in {None, RecordType.ALIAS} and subject is None:
+            sources.append(self._alias_rows())
+        if status is None and type in {None, RecordType.CONSTRAINT}:
+            sources.append(
+                (seq, constraint)
+                for seq, constraint in self._constraint_rows()
+                if subject is None or constraint.s == subject
+            )
+        if status is None and type in {None, RecordType.SOURCE} and subject is None:
+            sources.append(self._source_rows())
+        for _, record in heapq.merge(*sources, key=lambda row: row[0]):
+            yield record
+
+    def update_status(self, claim_ids: Iterable[str], status: KnowledgeStatus) -> None:
+        updates = [(status.value, claim_id) for claim_id in claim_ids]
+        with self.connection as connection:
+            connection.executemany("UPDATE claims SET status = ? WHERE id = ?", updates)
+            _bump(connection, "status_changes", len(updates))
+
+    def load_records(self) -> list[ClaimRecord | AliasRecord | ConstraintRecord]:
+        return self._records_after(0)
+
+    def generation(self) -> list[int]:
+        meta = dict(self.connection.execute("SELECT key, value FROM meta"))
+        return [
+            meta.get("epoch", 0),
+            self._last_seq(self.connection),
+            meta.get("status_changes", 0),
+        ]
+
+    def records_since(self, generation: list) -> list[Record] | None:
+        epoch, seq, status_changes = generation
+        current_epoch, current_seq, current_status_changes = self.generation()
+        if (
+            epoch != current_epoch
+            or status_changes != current_status_changes
+            or seq > current_seq
+        ):
+            return None
+        return self._records_after(seq)
+
+    def load_claims(self, status: KnowledgeStatus | None = None) -> list[ClaimRecord]:
+        return self.snapshot().claims(status)
+
+    def load_aliases(self) -> list[AliasRecord]:
+        return self.snapshot().aliases()
+
+    def load_constraints(self) -> list[ConstraintRecord]:
+        return self.snapshot().constraints()
+
+    def snapshot(self) -> SQLiteSnapshot:
+        return SQLiteSnapshot(self)
+
+    def write_world(self, prolog_text: str) -> Path:
+        self.ensure_root()
+        self.world_path.write_text(prolog_text, encoding="utf-8")
+        return self.world_path
+
+    def rewrite_records(
+        self, records: Iterable[ClaimRecord | AliasRecord | ConstraintRecord]
+    ) -> None:
+        records = list(records)
+        with self.connection as connection:
+            connection.execute("DELETE FROM claims")
+            connection.execute("DELETE FROM aliases")
+            connection.execute("DELETE FROM constraints")
+            connection.execute("DELETE FROM sources")
+            _bump(connection, "epoch", 1)
+            self._insert(connection, records)
+
+    def compact(self) -> int:
+        count = len(self.load_records())
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.connection.execute("VACUUM")
+        return count
+
+    def migrate_from_jsonl(self, source: KnowledgeStore | None = None) -> int:
+        source = source or KnowledgeStore(self.root)
+        if self.connection.execute("SELECT COUNT(*) FROM claims").fetchone()[0]:
+            raise RuntimeError(f"{self.database_path} already contains claims")
+        records = source.load_records()
+        self.rewrite_records(records)
+        return len(records)
+
+    def _insert(
+        self,
+        connection: sqlite3.Connection,
+        records: list[ClaimRecord | AliasRecord | ConstraintRecord | StatusRecord],
+    ) -> None:
+        seq = self._last_seq(connection)
+        for record in records:
+            seq += 1
+            if isinstance(record, ClaimRecord):
+                connection.execute(
+                    "INSERT OR REPLACE INTO claims (seq, " + CLAIM_COLUMNS + ") "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        seq,
+                        record.id,
+                        record.s,
+                        record.p,
+                        record.o,
+                        int(record.polarity),
+                        record.confidence,
+                        record.status.value,
+                        record.source_text,
+                        record.created_at,
+                    ),
+                )
+            elif isinstance(record, AliasRecord):
+                connection.execute(
+                    "INSERT INTO aliases (seq, canonical, alias, source_claim_id) "
+                    "VALUES (?, ?, ?, ?)",
+                    (seq, record.canonical, record.alias, record.source_claim_id),
+                )
+            elif isinstance(record, ConstraintRecord):
+                connection.execute(
+                    "INSERT INTO constraints (seq, kind, s, p, o, source_claim_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        seq,
+                        record.kind,
+                        record.s,
+                        record.p,
+                        record.o,
+                        record.source_claim_id,
+                    ),
+                )
+            elif isinstance(record, SourceRecord):
+                connection.execute(
+                    "INSERT INTO sources (seq, claim_id, source_text, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (seq, record.claim_id, record.source_text, record.created_at),
+                )
+            elif isinstance(record, StatusRecord):
+                connection.execute(
+                    "UPDATE claims SET status = ? WHERE id = ?",
+                    (record.status.value, record.claim_id),
+                )
+                _bump(connection, "status_changes", 1)
+
+    def _last_seq(self, connection: sqlite3.Connection) -> int:
+        return connection.execute(
+            "SELECT MAX(seq) FROM ("
+            "SELECT MAX(seq) AS seq FROM claims "
+            "UNION ALL SELECT MAX(seq) FROM aliases "
+            "UNION ALL SELECT MAX(seq) FROM constraints "
+            "UNION ALL SELECT MAX(seq) FROM sources)"
+        ).fetchone()[0] or 0
+
+    def _records_after(self, seq: int) -> list[Record]:
+        rows: list[tuple[int, Record]] = []
+        rows.extend(
+            self._claim_rows(
+                "SELECT seq, " + CLAIM_COLUMNS + " FROM claims WHERE seq > ?", (seq,)
+            )
+        )
+        rows.extend(self._alias_rows(after=seq))
+        rows.extend(self._constraint_rows(after=seq))
+        rows.extend(self._source_rows(after=seq))
+        rows.sort(key=lambda row: row[0])
+        return [record for _, record in rows]
+
+    def _claim_rows(
+        self, sql: str, parameters: tuple = ()
+    ) -> Iterable[tuple[int, ClaimRecord]]:
+        for seq, claim_id, s, p, o, polarity, *rest in self.connection.execute(
+            sql, parameters
+        ):
+            confidence, status, source_text, created_at = rest
+            yield seq, ClaimRecord(
+                id=claim_id,
+                s=s,
+                p=p,
+                o=o,
+                polarity=bool(polarity),
+                confidence=confidence,
+                status=status,
+                source_text=source_text,
+                created_at=created_at,
+            )
+
+    def _alias_rows(self, after: int = 0) -> Iterable[tuple[int, AliasRecord]]:
+        for seq, canonical, alias, source_claim_id in self.connection.execute(
+            "SELECT seq, canonical, alias, source_claim_id FROM aliases "
+            "WHERE seq > ? ORDER BY seq",
+            (after,),
+        ):
+            yield seq, AliasRecord(
+                canonical=canonical, alias=alias, source_claim_id=source_claim_id
+            )
+
+    def _constraint_rows(
+        self, after: int = 0
+    ) -> Iterable[tuple[int, ConstraintRecord]]:
+        for seq, kind, s, p, o, source_claim_id in self.connection.execute(
+            "SELECT seq, kind, s, p, o, source_claim_id FROM constraints "
+            "WHERE seq > ? ORDER BY seq",
+            (after,),
+        ):
+            yield seq, ConstraintRecord(
+                kind=kind, s=s, p=p, o=o, source_claim_id=source_claim_id
+            )
+
+    def _source_rows(
+        self, claim_id: str | None = None, after: int = 0
+    ) -> Iterable[tuple[int, SourceRecord]]:
+        sql = "SELECT seq, claim_id, source_text, created_at FROM sources WHERE seq > ?"
+        parameters: tuple = (after,)
+        if claim_id is not None:
+            sql += " AND claim_id = ?"
+            parameters = (after, claim_id)
+        for seq, source_claim_id, source_text, created_at in self.connection.execute(
+            sql + " ORDER BY seq", parameters
+        ):
+            yield seq, SourceRecord(
+                claim_id=source_claim_id, source_text=source_text, created_at=created_at
+            )
+
+
+def _bump(connection: sqlite3.Connection, key: str, amount: int) -> None:
+    connection.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value",
+        (key, amount),
+    )
+
+
+class SQLiteSnapshot:
+    def __init__(self, store: SQLiteKnowledgeStore) -> None:
+        self.store = store
+
+    def claims(self, status: KnowledgeStatus | None = None) -> list[ClaimRecord]:
+        return self.find_claims(status=status)
+
+    def aliases(self) -> list[AliasRecord]:
+        return [alias for _, alias in self.store._alias_rows()]
+
+    def alias_index(self) -> AliasIndex:
+        return AliasIndex(self.aliases())
+
+    def constraints(self) -> list[ConstraintRecord]:
+        return [constraint for _, constraint in self.store._constraint_rows()]
+
+    def sources_for(self, claim_id: str) -> list[str]:
+        return [record.source_text for _, record in self.store._source_rows(claim_id)]
+
+    def claim(self, claim_id: str) -> ClaimRecord | None:
+        for _, claim in self.store._claim_rows(
+            "SELECT seq, " + CLAIM_COLUMNS + " FROM claims WHERE id = ?", (claim_id,)
+        ):
+            return claim
+        return None
+
+    def find_claims(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> list[ClaimRecord]:
+        return list(self.iter_claims(s, p, o, status))
+
+    def iter_claims(
+        self,
+        s: str | None = None,
+        p: str | None = None,
+        o: str | None = None,
+        status: KnowledgeStatus | None = None,
+    ) -> Iterator[ClaimRecord]:
+        clauses = []
+        parameters = []
+        for column, value in (("s", s), ("p", p), ("o", o)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                parameters.append(value)
+        if status is not None:
+            clauses.append("status = ?")
+            parameters.append(status.value)
+        sql = "SELECT seq, " + CLAIM_COLUMNS + " FROM claims"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY seq"
+        for _, claim in self.store._claim_rows(sql, tuple(parameters)):
+            yield claim
+
+    def triples(
+        self, status: KnowledgeStatus | None = None
+    ) -> Iterator[tuple[str, str, str, bool]]:
+        sql = "SELECT s, p, o, polarity FROM claims"
+        parameters: tuple = ()
+        if status is not None:
+            sql += " WHERE status = ?"
+            parameters = (status.value,)
+        rows = self.store.connection.execute(sql + " ORDER BY seq", parameters)
+        for s, p, o, polarity in rows:
+            yield s, p, o, bool(polarity)
+
+    def claim_triples(
+        self, status: KnowledgeStatus | None = None
+    ) -> Iterator[tuple[str, str, str, bool, str]]:
+        sql = "SELECT s, p, o, polarity, id FROM claims"
+        parameters: tuple = ()
+        if status is not None:
+            sql += " WHERE status = ?"
+            parameters = (status.value,)
+        rows = self.store.connection.execute(sql + " ORDER BY seq", parameters)
+        for s, p, o, polarity, claim_id in rows:
+            yield s, p, o, bool(polarity), claim_id
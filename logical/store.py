@@ -1,67 +1,322 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
-from typing import Iterable
+import tempfile
+from typing import Callable, Iterable, Iterator
 
+from logical.binary_snapshot import MappedSnapshot, prefix_checksum, write_snapshot
+from logical.locking import GroupCommit, file_lock
 from logical.schema import (
     AliasRecord,
     ClaimRecord,
     ConstraintRecord,
+    RECORD_FORMAT_VERSION,
+    KnowledgeRecord,
     KnowledgeStatus,
-    record_from_dict,
+    RecordType,
+    StatusRecord,
+    record_from_stored,
     record_to_dict,
 )
+from logical.snapshot import KnowledgeSnapshot, Record
+
+
+STORE_BACKENDS = ("jsonl", "sqlite", "sharded")
+
+
+def open_store(
+    root: str | Path = ".logical", backend: str = "jsonl", fsync: bool = False
+):
+    if backend == "jsonl":
+        return KnowledgeStore(root, fsync=fsync)
+    if backend == "sqlite":
+        from logical.sqlite_store import SQLiteKnowledgeStore
+
+        return SQLiteKnowledgeStore(root, fsync=fsync)
+    if backend == "sharded":
+        from logical.sharded_store import ShardedKnowledgeStore
+
+        return ShardedKnowledgeStore(root, fsync=fsync)
+    raise ValueError(f"Unsupported store backend: {backend}")
 
 
 class KnowledgeStore:
-    def __init__(self, root: str | Path = ".logical") -> None:
+    def __init__(
+        self,
+        root: str | Path = ".logical",
+        fsync: bool = False,
+        group_commit: bool = False,
+        commit_delay: float = 0.0,
+    ) -> None:
         self.root = Path(root)
+        self.fsync = fsync
         self.knowledge_path = self.root / "knowledge.jsonl"
+        self.lock_path = self.root / "knowledge.lock"
         self.world_path = self.root / "world.pl"
+        self.snapshot_path = self.root / "snapshot.bin"
+        self._snapshot: KnowledgeSnapshot | None = None
+        self._inode: int | None = None
+        self._offset = 0
+        self._size = 0
+        self._overrides: tuple | None = None
+        self._group_commit = (
+            GroupCommit(self._write_lines, delay=commit_delay) if group_commit else None
+        )
 
     def ensure_root(self) -> None:
         self.root.mkdir(parents=True, exist_ok=True)
 
-    def append_records(
-        self, records: Iterable[ClaimRecord | AliasRecord | ConstraintRecord]
-    ) -> None:
-        records = list(records)
-        if not records:
+    def append_records(self, records: Iterable[KnowledgeRecord]) -> None:
+        lines = [
+            json.dumps(record_to_dict(record), sort_keys=True) + "\n"
+            for record in records
+        ]
+        if not lines:
             return
-        self.ensure_root()
-        with self.knowledge_path.open("a", encoding="utf-8") as handle:
-            for record in records:
-                handle.write(json.dumps(record_to_dict(record), sort_keys=True))
-                handle.write("\n")
+        if self._group_commit is not None:
+            self._group_commit.submit(lines)
+        else:
+            self._write_lines(lines)
+
+    def close(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._reset_snapshot()
+
+    def recover(self) -> int:
+        if not self.knowledge_path.exists():
+            return 0
+        with file_lock(self._lock_file()):
+            return self._truncate_torn_line()
 
     def load_records(self) -> list[ClaimRecord | AliasRecord | ConstraintRecord]:
+        return list(self.snapshot().records)
+
+    def iter_records(
+        self,
+        type: RecordType | None = None,
+        status: KnowledgeStatus | None = None,
+        subject: str | None = None,
+    ) -> Iterator[ClaimRecord | AliasRecord | ConstraintRecord]:
         if not self.knowledge_path.exists():
-            return []
-        records: list[ClaimRecord | AliasRecord | ConstraintRecord] = []
-        with self.knowledge_path.open("r", encoding="utf-8") as handle:
-            for line in handle:
-                if line.strip():
-                    records.append(record_from_dict(json.loads(line)))
-        return records
+            return
+        overrides = self._status_overrides()
+        applies = _status_applies(overrides)
+        wanted_type = None if type is None else type.value.encode("utf-8")
+        wanted_status = None if status is None else status.value.encode("utf-8")
+        wanted_subject = None if subject is None else subject.encode("utf-8")
+        stored_version = str(RECORD_FORMAT_VERSION).encode("utf-8")
+        with self.knowledge_path.open("rb") as handle:
+            for number, line in enumerate(handle):
+                if not line.endswith(b"\n"):
+                    break
+                record_type = _peek(line, b"type")
+                if record_type == b"status" or not line.strip():
+                    continue
+                if wanted_type is not None and record_type not in {None, wanted_type}:
+                    continue
+                if (
+                    wanted_status is not None
+                    and _peek(line, b"status") not in {None, wanted_status}
+                    and not applies(_peek(line, b"id", b"").decode("utf-8"), number)
+                ):
+                    continue
+                if (
+                    wanted_subject is not None
+                    and _peek(line, b"v") == stored_version
+                    and _peek(line, b"s") not in {None, wanted_subject}
+                ):
+                    continue
+                record = record_from_stored(json.loads(line))
+                if isinstance(record, StatusRecord):
+                    continue
+                if isinstance(record, ClaimRecord) and applies(record.id, number):
+                    record.status = overrides[record.id][1]
+                if type is not None and record.type is not type:
+                    continue
+                if status is not None and getattr(record, "status", None) is not status:
+                    continue
+                if subject is not None and getattr(record, "s", None) != subject:
+                    continue
+                yield record
+
+    def update_status(self, claim_ids: Iterable[str], status: KnowledgeStatus) -> None:
+        self.append_records(
+            StatusRecord(claim_id=claim_id, status=status) for claim_id in claim_ids
+        )
 
     def load_claims(self, status: KnowledgeStatus | None = None) -> list[ClaimRecord]:
-        claims = [
-            record for record in self.load_records() if isinstance(record, ClaimRecord)
-        ]
-        if status is None:
-            return claims
-        return [claim for claim in claims if claim.status is status]
+        return self.snapshot().claims(status)
 
     def load_aliases(self) -> list[AliasRecord]:
-        return [
-            record for record in self.load_records() if isinstance(record, AliasRecord)
-        ]
+        return self.snapshot().aliases()
 
     def load_constraints(self) -> list[ConstraintRecord]:
-        return [
-            record for record in self.load_records() if isinstance(record, ConstraintRecord)
-        ]
+        return self.snapshot().constraints()
+
+    def snapshot(self) -> KnowledgeSnapshot:
+        try:
+            stat = self.knowledge_path.stat()
+        except FileNotFoundError:
+            self._reset_snapshot()
+            self._snapshot = KnowledgeSnapshot()
+            return self._snapshot
+        if (
+            self._snapshot is None
+            or stat.st_ino != self._inode
+            or stat.st_size < self._offset
+            or not self._watermark_is_line_boundary()
+        ):
+            self._reset_snapshot()
+            self._snapshot = self._open_binary_snapshot(stat.st_ino, stat.st_size)
+            self._inode = stat.st_ino
+        if stat.st_size != self._size:
+            self._read_tail()
+            self._size = stat.st_size
+        return self._snapshot
+
+    def generation(self) -> list[int]:
+        snapshot = self.snapshot()
+        return [self._inode or 0, len(snapshot), snapshot.status_changes]
+
+    def records_since(self, generation: list) -> list[Record] | None:
+        inode, count, status_changes = generation
+        snapshot = self.snapshot()
+        if (
+            inode != (self._inode or 0)
+            or status_changes != snapshot.status_changes
+            or count > len(snapshot)
+        ):
+            return None
+        return snapshot.records_since(count)
+
+    def watermark(self) -> tuple[int | None, int, int]:
+        return self._inode, self._offset, self._size
+
+    def install_snapshot(
+        self, snapshot: KnowledgeSnapshot, watermark: tuple[int | None, int, int]
+    ) -> None:
+        self._snapshot = snapshot
+        self._inode, self._offset, self._size = watermark
+
+    def write_snapshot(self) -> Path:
+        self.ensure_root()
+        stat = self.knowledge_path.stat() if self.knowledge_path.exists() else None
+        records = []
+        watermark = 0
+        if stat is not None:
+            with self.knowledge_path.open("rb") as handle:
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        record = record_from_stored(json.loads(line))
+                        records.append((watermark, record))
+                    watermark += len(line)
+        return write_snapshot(
+            self.snapshot_path,
+            records,
+            inode=0 if stat is None else stat.st_ino,
+            watermark=watermark,
+            checksum=prefix_checksum(self.knowledge_path, watermark) if stat else 0,
+        )
+
+    def _open_binary_snapshot(self, inode: int, size: int) -> KnowledgeSnapshot:
+        if not self.snapshot_path.exists():
+            return KnowledgeSnapshot()
+        base = MappedSnapshot.open(self.snapshot_path, self.knowledge_path)
+        if (
+            base is None
+            or base.inode != inode
+            or base.watermark > size
+            or base.checksum != prefix_checksum(self.knowledge_path, base.watermark)
+        ):
+            if base is not None:
+                base.close()
+            return KnowledgeSnapshot()
+        self._offset = base.watermark
+        if not self._watermark_is_line_boundary():
+            self._offset = 0
+            base.close()
+            return KnowledgeSnapshot()
+        return KnowledgeSnapshot(base=base)
+
+    def _status_overrides(self) -> dict[str, tuple[int, KnowledgeStatus]]:
+        stat = self.knowledge_path.stat()
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if self._overrides is not None and self._overrides[0] == key:
+            return self._overrides[1]
+        overrides: dict[str, tuple[int, KnowledgeStatus]] = {}
+        with self.knowledge_path.open("rb") as handle:
+            for number, line in enumerate(handle):
+                if not line.endswith(b"\n"):
+                    break
+                if _peek(line, b"type") == b"status":
+                    change = record_from_stored(json.loads(line))
+                    overrides[change.claim_id] = (number, change.status)
+        self._overrides = (key, overrides)
+        return overrides
+
+    def _write_lines(self, lines: list[str]) -> None:
+        with file_lock(self._lock_file()):
+            self._truncate_torn_line()
+            with self.knowledge_path.open("a", encoding="utf-8") as handle:
+                handle.write("".join(lines))
+                handle.flush()
+                if self.fsync:
+                    os.fsync(handle.fileno())
+
+    def _truncate_torn_line(self) -> int:
+        try:
+            size = self.knowledge_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+        if size == 0:
+            return 0
+        with self.knowledge_path.open("rb+") as handle:
+            handle.seek(size - 1)
+            if handle.read(1) == b"\n":
+                return 0
+            position = size
+            while position > 0:
+                start = max(0, position - 65536)
+                handle.seek(start)
+                newline = handle.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            handle.truncate(position)
+        return size - position
+
+    def _lock_file(self) -> Path:
+        self.ensure_root()
+        return self.lock_path
+
+    def _reset_snapshot(self) -> None:
+        self._snapshot = None
+        self._inode = None
+        self._offset = 0
+        self._size = 0
+
+    def _watermark_is_line_boundary(self) -> bool:
+        if self._offset == 0:
+            return True
+        with self.knowledge_path.open("rb") as handle:
+            handle.seek(self._offset - 1)
+            return handle.read(1) == b"\n"
+
+    def _read_tail(self) -> None:
+        with self.knowledge_path.open("rb") as handle:
+            handle.seek(self._offset)
+            tail = handle.read()
+        end = tail.rfind(b"\n") + 1
+        for line in tail[:end].splitlines():
+            if line.strip():
+                self._snapshot.add(record_from_stored(json.loads(line)))
+        self._offset += end
 
     def write_world(self, prolog_text: str) -> Path:
         self.ensure_root()
@@ -71,8 +326,64 @@ class KnowledgeStore:
     def rewrite_records(
         self, records: Iterable[ClaimRecord | AliasRecord | ConstraintRecord]
     ) -> None:
-        self.ensure_root()
-        with self.knowledge_path.open("w", encoding="utf-8") as handle:
-            for record in records:
-                handle.write(json.dumps(record_to_dict(record), sort_keys=True))
-                handle.write("\n")
+        with file_lock(self._lock_file()):
+            self._replace_records(records)
+
+    def compact(self) -> int:
+        with file_lock(self._lock_file()):
+            self._truncate_torn_line()
+            records = self.snapshot().records
+            self._replace_records(records)
+        return len(records)
+
+    def _replace_records(
+        self, records: Iterable[ClaimRecord | AliasRecord | ConstraintRecord]
+    ) -> None:
+        self._reset_snapshot()
+        descriptor, temp_name = tempfile.mkstemp(
+            dir=self.root, prefix=".knowledge-", suffix=".jsonl"
+        )
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                for record in records:
+                    handle.write(json.dumps(record_to_dict(record), sort_keys=True))
+                    handle.write("\n")
+                handle.flush()
+                os.fsync(handle.fileno())
+            self.snapshot_path.unlink(missing_ok=True)
+            os.replace(temp_name, self.knowledge_path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+        _fsync_directory(self.root)
+
+
+def _peek(line: bytes, key: bytes, default: bytes | None = None) -> bytes | None:
+    marker = b'"' + key + b'": '
+    start = line.find(marker)
+    if start == -1:
+        return default
+    start += len(marker)
+    if line[start : start + 1] != b'"':
+        end = line.find(b",", start)
+        return line[start : end if end != -1 else line.rfind(b"}")].strip()
+    end = line.find(b'"', start + 1)
+    return line[start + 1 : end]
+
+
+def _status_applies(
+    overrides: dict[str, tuple[int, KnowledgeStatus]],
+) -> Callable[[str, int], bool]:
+    def applies(claim_id: str, number: int) -> bool:
+        change = overrides.get(claim_id)
+        return change is not None and change[0] > number
+
+    return applies
+
+
+def _fsync_directory(path: Path) -> None:
+    descriptor = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
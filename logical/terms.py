@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from array import array
+from typing import TYPE_CHECKING
+
+from logical.schema import KnowledgeStatus
+
+if TYPE_CHECKING:
+    from logical.binary_snapshot import MappedSnapshot
+
+
+STATUS_CODES = {
+    KnowledgeStatus.ACCEPTED: 0,
+    KnowledgeStatus.QUARANTINED: 1,
+}
+STATUSES = {code: status for status, code in STATUS_CODES.items()}
+
+
+class TermDictionary:
+    def __init__(self, base: MappedSnapshot | None = None) -> None:
+        self.base = base
+        self.offset = 0 if base is None else base.term_count
+        self.terms: list[str] = []
+        self.ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self.offset + len(self.terms)
+
+    def intern(self, term: str) -> int:
+        term_id = self.lookup(term)
+        if term_id is None:
+            term_id = len(self)
+            self.terms.append(term)
+            self.ids[term] = term_id
+        return term_id
+
+    def lookup(self, term: str) -> int | None:
+        term_id = self.ids.get(term)
+        if term_id is None and self.base is not None:
+            term_id = self.base.lookup(term)
+            if term_id is not None:
+                self.ids[term] = term_id
+        return term_id
+
+    def term(self, term_id: int) -> str:
+        if term_id < self.offset:
+            return self.base.term(term_id)
+        return self.terms[term_id - self.offset]
+
+
+class TripleColumns:
+    def __init__(self) -> None:
+        self.s = array("I")
+        self.p = array("I")
+        self.o = array("I")
+        self.polarity = array("B")
+        self.status = array("B")
+
+    def __len__(self) -> int:
+        return len(self.s)
+
+    def append(
+        self, s: int, p: int, o: int, polarity: bool, status: KnowledgeStatus
+    ) -> int:
+        row = len(self.s)
+        self.s.append(s)
+        self.p.append(p)
+        self.o.append(o)
+        self.polarity.append(int(polarity))
+        self.status.append(STATUS_CODES[status])
+        return row
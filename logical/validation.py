@@ -5,7 +5,23 @@ from dataclasses import dataclass
 from logical.schema import ClaimRecord, ConstraintRecord
 
 
-SUPPORTED_CONSTRAINTS = {"functional_for_subject"}
+SUPPORTED_CONSTRAINTS = {
+    "functional_for_subject",
+    "max_cardinality",
+    "transitive",
+    "inverse_functional",
+    "symmetric",
+    "inverse_of",
+    "disjoint_values",
+}
+PREDICATE_CONSTRAINTS = {
+    "transitive",
+    "inverse_functional",
+    "symmetric",
+    "inverse_of",
+    "disjoint_values",
+}
+PAIRED_CONSTRAINTS = {"inverse_of", "disjoint_values"}
 
 
 @dataclass(frozen=True)
@@ -54,7 +70,16 @@ def validate_constraint(constraint: ConstraintRecord) -> list[ValidationIssue]:
                 message=f"unsupported constraint kind {constraint.kind}",
             )
         )
-    if "unknown" in {constraint.s, constraint.p}:
+    if constraint.kind in PREDICATE_CONSTRAINTS:
+        if constraint.p == "unknown":
+            issues.append(
+                ValidationIssue(
+                    kind="missing_constraint_term",
+                    record_id=constraint.source_claim_id,
+                    message="constraint is missing a predicate",
+                )
+            )
+    elif "unknown" in {constraint.s, constraint.p}:
         issues.append(
             ValidationIssue(
                 kind="missing_constraint_term",
@@ -62,4 +87,22 @@ def validate_constraint(constraint: ConstraintRecord) -> list[ValidationIssue]:
                 message="constraint is missing a subject or predicate",
             )
         )
+    if constraint.kind in PAIRED_CONSTRAINTS and constraint.o in {"", "unknown"}:
+        issues.append(
+            ValidationIssue(
+                kind="missing_constraint_term",
+                record_id=constraint.source_claim_id,
+                message=f"{constraint.kind} constraint is missing the other predicate",
+            )
+        )
+    if constraint.kind == "max_cardinality" and not (
+        constraint.o.isdigit() and int(constraint.o) > 0
+    ):
+        issues.append(
+            ValidationIssue(
+                kind="invalid_constraint_value",
+                record_id=constraint.source_claim_id,
+                message="max_cardinality constraint needs a positive count in o",
+            )
+        )
     return issues
@@ -0,0 +1,164 @@
+from pathlib import Path
+
+import pytest
+
+from logical.aliases import AliasIndex
+from logical.engine import NativeEngine
+from logical.schema import (
+    AliasRecord,
+    ClaimRecord,
+    ConstraintRecord,
+    ExtractionResult,
+    QueryIntent,
+    claim_id_for,
+)
+from logical.service import (
+    add_extraction,
+    export_prolog,
+    find_bindings,
+    rebuild_world,
+)
+from logical.store import KnowledgeStore
+
+
+def test_alias_index_merges_classes_under_the_declared_canonical():
+    index = AliasIndex(
+        [
+            AliasRecord(canonical="new york city", alias="nyc"),
+            AliasRecord(canonical="big apple", alias="gotham"),
+            AliasRecord(canonical="new york city", alias="big apple"),
+            AliasRecord(canonical="nyc", alias="new york city"),
+        ]
+    )
+
+    assert index.find("gotham") == "new_york_city"
+    assert index.find("nyc") == "new_york_city"
+    assert index.find("boston") == "boston"
+    assert sorted(index.members("nyc")) == [
+        "big_apple",
+        "gotham",
+        "new_york_city",
+        "nyc",
+    ]
+    assert index.canonical_query(QueryIntent(s="nyc", p="?p", o="?o")).s == (
+        "new_york_city"
+    )
+
+
+def test_aliases_are_applied_at_ingest_projection_and_query_time(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ClaimRecord(s="nyc", p="population", o="8m", source_text="old"),
+            ConstraintRecord(
+                kind="functional_for_subject",
+                s="nyc",
+                p="population",
+                source_claim_id="constraint-1",
+            ),
+        ]
+    )
+
+    result = add_extraction(
+        ExtractionResult(
+            claims=[
+                ClaimRecord(s="NYC", p="state", o="new york", source_text="a"),
+                ClaimRecord(
+                    s="new york city", p="population", o="9m", source_text="b"
+                ),
+            ],
+            aliases=[AliasRecord(canonical="new york city", alias="NYC")],
+        ),
+        store,
+    )
+
+    assert [(claim.s, claim.id) for claim in result.accepted] == [
+        (
+            "new_york_city",
+            claim_id_for("new_york_city", "state", "new_york", True),
+        )
+    ]
+    assert [conflict.kind for conflict in result.conflicts] == [
+        "functional_for_subject"
+    ]
+    world = export_prolog(store)
+    assert "triple(new_york_city,population,'8m')." in world
+    assert "triple(nyc," not in world
+    assert "functional_for_subject(new_york_city,population)." in world
+
+    engine = NativeEngine(store.snapshot())
+    answer, evidence = engine.answer(QueryIntent(s="nyc", p="population", o="8m"))
+    assert answer == "true"
+    assert [claim.s for claim in evidence] == ["new_york_city"]
+    bindings = find_bindings(
+        QueryIntent(s="nyc", p="?p", o="?o"), store, engine="native"
+    )
+    assert sorted(binding.values["p"] for binding in bindings) == [
+        "population",
+        "state",
+    ]
+
+
+def test_new_alias_regenerates_the_world_instead_of_appending(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="nyc", p="state", o="new york", source_text="a")]
+        ),
+        store,
+    )
+    world_path = Path(rebuild_world(store))
+
+    add_extraction(
+        ExtractionResult(aliases=[AliasRecord(canonical="new york city", alias="nyc")]),
+        store,
+    )
+    rebuild_world(store)
+
+    world = world_path.read_text()
+    assert world == export_prolog(store)
+    assert "triple(new_york_city,state,new_york)." in world
+
+
+def test_reingesting_a_claim_under_an_aliased_spelling_is_a_duplicate(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    claim = ClaimRecord(s="nyc", p="size", o="big", source_text="nyc is big")
+    add_extraction(ExtractionResult(claims=[claim]), store)
+    add_extraction(
+        ExtractionResult(aliases=[AliasRecord(canonical="new york city", alias="nyc")]),
+        store,
+    )
+
+    again = ClaimRecord(s="nyc", p="size", o="big", source_text="nyc is huge")
+    result = add_extraction(ExtractionResult(claims=[again]), store)
+
+    assert result.accepted == [] and len(result.duplicates) == 1
+    stored_id = claim_id_for("nyc", "size", "big", True)
+    assert store.snapshot().sources_for(stored_id) == ["nyc is huge"]
+    world = Path(rebuild_world(store)).read_text()
+    assert world.count("triple(new_york_city,size,big).") == 1
+
+
+def test_failed_append_leaves_the_cached_alias_index_untouched(tmp_path, monkeypatch):
+    store = KnowledgeStore(tmp_path)
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="nyc", p="state", o="new york", source_text="a")]
+        ),
+        store,
+    )
+
+    def fail(records):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "append_records", fail)
+    with pytest.raises(OSError):
+        add_extraction(
+            ExtractionResult(
+                aliases=[AliasRecord(canonical="new york city", alias="nyc")]
+            ),
+            store,
+        )
+
+    assert store.snapshot().alias_index().find("nyc") == "nyc"
+    assert "triple(nyc,state,new_york)." in export_prolog(store)
@@ -1,5 +1,8 @@
+import json
+
 from logical import cli
 from logical.schema import ClaimRecord, ConstraintRecord, ExtractionResult, QueryIntent
+from logical.store import KnowledgeStore
 
 
 class FakeExtractor:
@@ -55,8 +58,11 @@ class FakeExtractor:
         return self.extractions[text]
 
     def extract_query(self, text):
-        assert text == "is the sky red?"
-        return QueryIntent(s="sky", p="color", o="red")
+        queries = {
+            "is the sky red?": QueryIntent(s="sky", p="color", o="red"),
+            "is the sky green?": QueryIntent(s="sky", p="color", o="green"),
+        }
+        return queries[text]
 
 
 def test_cli_add_quarantines_conflict_and_ask_returns_true(tmp_path, capsys):
@@ -136,3 +142,120 @@ def test_cli_add_invalid_logic_reports_validation_issue(tmp_path, capsys):
     output = capsys.readouterr().out
     assert "quarantined: unknown color red" in output
     assert "invalid:" in output
+
+
+def test_cli_compact_folds_replacements_into_the_log(tmp_path, capsys, monkeypatch):
+    extractor = FakeExtractor()
+    cli.main(["--store-dir", str(tmp_path), "add", "the sky is red"], extractor)
+    cli.main(
+        ["--store-dir", str(tmp_path), "add", "a sky can only be one color"],
+        extractor,
+    )
+    monkeypatch.setattr("builtins.input", lambda _: "r")
+    cli.main(
+        ["--store-dir", str(tmp_path), "add", "--interactive", "the sky is blue"],
+        extractor,
+    )
+    assert '"type": "status"' in (tmp_path / "knowledge.jsonl").read_text()
+
+    assert cli.main(["--store-dir", str(tmp_path), "compact"], extractor) == 0
+
+    assert "compacted 3 records" in capsys.readouterr().out
+    assert '"type": "status"' not in (tmp_path / "knowledge.jsonl").read_text()
+
+
+def test_cli_ask_batch_prints_one_json_result_per_question(tmp_path, capsys):
+    extractor = FakeExtractor()
+    cli.main(["--store-dir", str(tmp_path), "add", "the sky is red"], extractor)
+    capsys.readouterr()
+    questions = tmp_path / "questions.txt"
+    questions.write_text("is the sky red?\n\nis the sky green?\n", encoding="utf-8")
+
+    exit_code = cli.main(
+        ["--store-dir", str(tmp_path), "ask-batch", str(questions)], extractor
+    )
+
+    assert exit_code == 0
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(result["question"], result["answer"]) for result in results] == [
+        ("is the sky red?", "true"),
+        ("is the sky green?", "unknown"),
+    ]
+    assert results[0]["evidence"] == ["red"]
+    assert results[1]["evidence"] == []
+
+
+def test_cli_check_audit_reports_contradictions_and_functional_violations(
+    tmp_path, capsys
+):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ConstraintRecord(
+                kind="functional_for_subject", s="sky", p="color", source_claim_id="c"
+            ),
+            ClaimRecord(id="sky-red", s="sky", p="color", o="red", source_text="r"),
+            ClaimRecord(id="sky-blue", s="sky", p="color", o="blue", source_text="b"),
+            ClaimRecord(
+                id="sky-not-red",
+                s="sky",
+                p="color",
+                o="red",
+                source_text="n",
+                polarity=False,
+            ),
+            ClaimRecord(id="grass", s="grass", p="color", o="green", source_text="g"),
+        ]
+    )
+    arguments = ["--store-dir", str(tmp_path), "check", "--audit"]
+
+    assert cli.main(arguments) == 1
+    output = capsys.readouterr().out
+    assert "4 accepted claims, 1 contradictions, 1 functional violations" in output
+    assert "contradiction: sky color red (sky-red, sky-not-red)" in output
+    assert "functional: sky color red=(sky-red) blue=(sky-blue)" in output
+
+    assert cli.main([*arguments, "--json"]) == 1
+    report = json.loads(capsys.readouterr().out)
+    assert report["counts"] == {"contradictions": 1, "functional_violations": 1}
+    assert report["contradictions"][0]["denied"] == ["sky-not-red"]
+    assert report["functional_violations"][0]["values"] == {
+        "red": ["sky-red"],
+        "blue": ["sky-blue"],
+    }
+
+
+def test_cli_import_bulk_loads_extractions_in_parallel(tmp_path, capsys):
+    def triple(text, s, p, o):
+        return {"text": text, "claims": [{"s": s, "p": p, "o": o}]}
+
+    lines = [
+        {
+            "text": "a sky is one color",
+            "constraints": [
+                {"kind": "functional_for_subject", "s": "sky", "p": "color"}
+            ],
+        },
+        triple("the sky is blue", "sky", "color", "blue"),
+        triple("the sky is red", "sky", "color", "red"),
+        triple("grass is green", "grass", "color", "green"),
+    ]
+    extractions = tmp_path / "extractions.jsonl"
+    extractions.write_text("".join(json.dumps(line) + "\n" for line in lines))
+    store_dir = tmp_path / "store"
+
+    arguments = ["--store-dir", str(store_dir), "import", str(extractions)]
+    assert cli.main([*arguments, "--workers", "2"]) == 2
+
+    output = capsys.readouterr().out
+    assert "imported: 2 accepted, 1 quarantined, 0 duplicates" in output
+    assert "sky color can only have one value; blue is already accepted" in output
+    assert "triple(sky,color,blue)." in (store_dir / "world.pl").read_text()
+
+
+def test_cli_migrate_names_the_backends_that_support_it(tmp_path, capsys):
+    assert cli.main(["--store-dir", str(tmp_path), "migrate"]) == 1
+
+    assert "--store-backend sqlite or --store-backend sharded" in (
+        capsys.readouterr().out
+    )
@@ -0,0 +1,221 @@
+from logical import cli
+from logical.engine import NativeEngine
+from logical.schema import ClaimRecord, ConstraintRecord, QueryIntent
+from logical.store import KnowledgeStore
+
+
+def build_store(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ConstraintRecord(
+                kind="functional_for_subject",
+                s="sky",
+                p="color",
+                source_claim_id="constraint-1",
+            ),
+            ClaimRecord(id="sky-red", s="sky", p="color", o="red", source_text="r"),
+            ClaimRecord(
+                id="grass-not-red",
+                s="grass",
+                p="color",
+                o="red",
+                source_text="g",
+                polarity=False,
+            ),
+        ]
+    )
+    return store
+
+
+def answer(engine, s, p, o, polarity=True):
+    result, evidence = engine.answer(QueryIntent(s=s, p=p, o=o, polarity=polarity))
+    return result, [claim.id for claim in evidence]
+
+
+def test_native_engine_answers_three_valued_questions_with_evidence(tmp_path):
+    engine = NativeEngine(build_store(tmp_path).snapshot())
+
+    assert answer(engine, "sky", "color", "red") == ("true", ["sky-red"])
+    assert answer(engine, "sky", "color", "red", False) == ("false", ["sky-red"])
+    assert answer(engine, "grass", "color", "red") == ("false", ["grass-not-red"])
+    assert answer(engine, "grass", "color", "green") == ("unknown", [])
+
+
+def test_native_engine_closes_the_world_for_functional_predicates(tmp_path):
+    engine = NativeEngine(build_store(tmp_path).snapshot())
+
+    assert answer(engine, "sky", "color", "blue") == ("false", ["sky-red"])
+    assert answer(engine, "sky", "color", "blue", False) == ("true", ["sky-red"])
+
+
+def test_snapshot_indexes_predicate_object_pairs(tmp_path):
+    store = build_store(tmp_path)
+    store.write_snapshot()
+    store.append_records(
+        [ClaimRecord(id="rose-red", s="rose", p="color", o="red", source_text="x")]
+    )
+
+    snapshot = KnowledgeStore(tmp_path).snapshot()
+
+    assert snapshot.base is not None
+    assert [claim.id for claim in snapshot.find_claims(p="color", o="red")] == [
+        "sky-red",
+        "grass-not-red",
+        "rose-red",
+    ]
+
+
+def test_cli_ask_can_use_the_native_engine(tmp_path, capsys):
+    build_store(tmp_path)
+
+    class Extractor:
+        def extract_query(self, text):
+            return QueryIntent(s="sky", p="color", o="blue")
+
+    exit_code = cli.main(
+        ["--store-dir", str(tmp_path), "ask", "--engine", "native", "is it blue?"],
+        Extractor(),
+    )
+
+    assert exit_code == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "false",
+        "evidence: sky color red (sky-red)",
+    ]
+    assert not (tmp_path / "world.pl").exists()
+
+
+def test_native_engine_streams_bindings_using_the_bound_positions(tmp_path):
+    store = build_store(tmp_path)
+    store.append_records(
+        [
+            ClaimRecord(id="rose-red", s="rose", p="color", o="red", source_text="x"),
+            ClaimRecord(id="rose-rose", s="rose", p="named", o="rose", source_text="y"),
+        ]
+    )
+    engine = NativeEngine(store.snapshot())
+
+    def bindings(s, p, o, polarity=True):
+        query = QueryIntent(s=s, p=p, o=o, polarity=polarity)
+        return [(values, claim.id) for values, claim in engine.solutions(query)]
+
+    assert bindings("?thing", "color", "red") == [
+        ({"thing": "sky"}, "sky-red"),
+        ({"thing": "rose"}, "rose-red"),
+    ]
+    assert bindings("sky", "color", None) == [({"o": "red"}, "sky-red")]
+    assert bindings("?x", "color", "red", False) == [({"x": "grass"}, "grass-not-red")]
+    assert bindings("?x", None, "?x") == [({"x": "rose", "p": "named"}, "rose-rose")]
+
+
+def test_cli_ask_prints_variable_bindings_with_limit_and_offset(tmp_path, capsys):
+    build_store(tmp_path).append_records(
+        [ClaimRecord(id="rose-red", s="rose", p="color", o="red", source_text="x")]
+    )
+
+    class Extractor:
+        def extract_query(self, text):
+            return QueryIntent(s="?what", p="color", o="red")
+
+    for engine in ("native", "prolog"):
+        exit_code = cli.main(
+            [
+                "--store-dir",
+                str(tmp_path),
+                "ask",
+                "--engine",
+                engine,
+                "--limit",
+                "1",
+                "--offset",
+                "1",
+                "what is red?",
+            ],
+            Extractor(),
+        )
+
+        assert exit_code == 0
+        assert capsys.readouterr().out.splitlines() == [
+            "true",
+            "binding: what=rose (rose-red)",
+        ]
+
+
+def test_native_engine_follows_transitive_predicates(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ConstraintRecord(
+                kind="transitive", s="", p="is_a", source_claim_id="constraint-1"
+            ),
+            *(
+                ClaimRecord(id=f"{s}-{o}", s=s, p="is_a", o=o, source_text=s)
+                for s, o in (
+                    ("poodle", "dog"),
+                    ("dog", "mammal"),
+                    ("mammal", "animal"),
+                    ("animal", "mammal"),
+                    ("cat", "mammal"),
+                )
+            ),
+        ]
+    )
+    engine = NativeEngine(store.snapshot())
+
+    assert answer(engine, "poodle", "is_a", "animal") == ("true", ["poodle-dog"])
+    assert answer(engine, "poodle", "is_a", "animal", False) == (
+        "false",
+        ["poodle-dog"],
+    )
+    assert answer(engine, "animal", "is_a", "poodle") == ("unknown", [])
+
+    kinds = engine.solutions(QueryIntent(s="poodle", p="is_a", o="?kind"))
+    assert [(values, claim.id) for values, claim in kinds] == [
+        ({"kind": "dog"}, "poodle-dog"),
+        ({"kind": "mammal"}, "poodle-dog"),
+        ({"kind": "animal"}, "poodle-dog"),
+    ]
+    animals = engine.solutions(QueryIntent(s="?x", p="is_a", o="animal"))
+    assert sorted(values["x"] for values, _ in animals) == [
+        "animal",
+        "cat",
+        "dog",
+        "mammal",
+        "poodle",
+    ]
+
+
+def test_native_engine_answers_through_symmetric_and_inverse_predicates(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ConstraintRecord(
+                kind="symmetric", s="", p="married_to", source_claim_id="c1"
+            ),
+            ConstraintRecord(
+                kind="inverse_of",
+                s="",
+                p="parent_of",
+                o="child_of",
+                source_claim_id="c2",
+            ),
+            ClaimRecord(id="m", s="bob", p="married_to", o="cat", source_text="m"),
+            ClaimRecord(id="p", s="bob", p="parent_of", o="ann", source_text="p"),
+            ClaimRecord(
+                id="n",
+                s="dan",
+                p="child_of",
+                o="eve",
+                source_text="n",
+                polarity=False,
+            ),
+        ]
+    )
+    engine = NativeEngine(store.snapshot())
+
+    assert answer(engine, "cat", "married_to", "bob") == ("true", ["m"])
+    assert answer(engine, "ann", "child_of", "bob") == ("true", ["p"])
+    assert answer(engine, "ann", "child_of", "bob", False) == ("false", ["p"])
+    assert answer(engine, "eve", "parent_of", "dan") == ("false", ["n"])
+    assert answer(engine, "cat", "parent_of", "bob") == ("unknown", [])
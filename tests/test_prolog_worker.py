@@ -0,0 +1,102 @@
+import sys
+
+import pytest
+
+from logical import prolog
+from logical.prolog import PrologWorker, loadable_world
+
+
+FAKE_SWIPL = """\
+import sys
+import time
+
+for line in sys.stdin:
+    if line.startswith("consult("):
+        with open(sys.argv[-1] + ".consults", "a") as handle:
+            handle.write(line)
+        if "slow" in line:
+            time.sleep(0.5)
+        print("ok", flush=True)
+    elif "hang" in line:
+        time.sleep(60)
+    else:
+        print("true" if "red" in line else "false", flush=True)
+"""
+
+
+@pytest.fixture
+def fake_swipl(tmp_path):
+    script = tmp_path / "fake_swipl.py"
+    script.write_text(FAKE_SWIPL, encoding="utf-8")
+    executable = tmp_path / "swipl"
+    executable.write_text(
+        f'#!/bin/sh\nexec {sys.executable} {script} "$@" {tmp_path / "world"}\n',
+        encoding="utf-8",
+    )
+    executable.chmod(0o755)
+    return executable
+
+
+def test_worker_consults_once_per_world_version_and_restarts_on_hangs(
+    tmp_path, fake_swipl, monkeypatch
+):
+    lookups = []
+    loadable = prolog.loadable_world
+    monkeypatch.setattr(
+        prolog, "loadable_world", lambda path: lookups.append(path) or loadable(path)
+    )
+    world_path = tmp_path / "world.pl"
+    world_path.write_text("triple(sky,color,red).\n", encoding="utf-8")
+    consults = tmp_path / "world.consults"
+    worker = PrologWorker(executable=str(fake_swipl), timeout=0.5)
+    try:
+        assert worker.ask(world_path, "triple(sky,color,red)") is True
+        assert worker.ask(world_path, "triple(sky,color,blue)") is False
+        assert len(consults.read_text().splitlines()) == 1
+        assert len(lookups) == 1
+
+        world_path.write_text("triple(sky,color,blue).\n", encoding="utf-8")
+        world_path.with_suffix(".generation").write_text("[0, 1, 1]")
+        worker.ask(world_path, "triple(sky,color,blue)")
+        assert len(consults.read_text().splitlines()) == 2
+
+        with pytest.raises(RuntimeError, match="timed out|failed"):
+            worker.ask(world_path, "hang")
+
+        assert worker.ask(world_path, "triple(sky,color,red)") is True
+        assert len(consults.read_text().splitlines()) == 3
+    finally:
+        worker.close()
+
+
+def test_consult_is_not_bound_by_the_query_timeout(tmp_path, fake_swipl):
+    world_path = tmp_path / "slow_world.pl"
+    world_path.write_text("triple(sky,color,red).\n", encoding="utf-8")
+    worker = PrologWorker(executable=str(fake_swipl), timeout=0.2)
+    try:
+        assert worker.ask(world_path, "triple(sky,color,red)") is True
+    finally:
+        worker.close()
+
+    worker = PrologWorker(executable=str(fake_swipl), timeout=0.2, consult_timeout=0.1)
+    try:
+        with pytest.raises(RuntimeError, match="failed"):
+            worker.ask(world_path, "triple(sky,color,red)")
+    finally:
+        worker.close()
+
+
+def test_compiled_world_is_used_only_while_its_key_matches_the_source(tmp_path):
+    world_path = tmp_path / "world.pl"
+    world_path.write_text("triple(sky,color,red).\n", encoding="utf-8")
+    qlf_path = tmp_path / "world.qlf"
+    qlf_path.write_bytes(b"compiled")
+    key_path = tmp_path / "world.qlf.key"
+    stat = world_path.stat()
+    key_path.write_text(f"{stat.st_mtime_ns}:{stat.st_size}")
+
+    assert loadable_world(world_path) == qlf_path
+
+    world_path.write_text("triple(sky,color,blue).\n", encoding="utf-8")
+
+    assert loadable_world(world_path) == world_path
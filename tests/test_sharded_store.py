@@ -0,0 +1,94 @@
+import pytest
+
+from logical.schema import ClaimRecord, ConstraintRecord, ExtractionResult, KnowledgeStatus
+from logical.service import add_extraction, export_prolog
+from logical.sharded_store import ShardedKnowledgeStore, shard_for_subject
+from logical.store import KnowledgeStore
+
+
+def _claims(count):
+    return [
+        ClaimRecord(
+            id=f"claim-{index}",
+            s=f"entity {index}",
+            p="color",
+            o="red",
+            source_text=f"entity {index} is red",
+        )
+        for index in range(count)
+    ]
+
+
+def test_sharded_store_partitions_by_subject_and_loads_in_parallel(tmp_path):
+    store = ShardedKnowledgeStore(tmp_path, shards=4)
+    store.append_records(_claims(40))
+
+    for index, shard in enumerate(store.shards):
+        assert all(
+            shard_for_subject(claim.s, 4) == index for claim in shard.load_claims()
+        )
+
+    reopened = ShardedKnowledgeStore(tmp_path, workers=2, parallel_load_bytes=0)
+    claims = reopened.load_claims(status=KnowledgeStatus.ACCEPTED)
+
+    assert reopened.shard_count == 4
+    assert sorted(claim.id for claim in claims) == sorted(
+        claim.id for claim in _claims(40)
+    )
+    assert [claim.id for claim in reopened.snapshot().find_claims(s="entity_7")] == [
+        "claim-7"
+    ]
+
+
+def test_sharded_replace_touches_only_the_subject_shard(tmp_path):
+    store = ShardedKnowledgeStore(tmp_path, shards=4)
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(id="red", s="sky", p="color", o="red", source_text="r")],
+            constraints=[
+                ConstraintRecord(
+                    kind="functional_for_subject",
+                    s="sky",
+                    p="color",
+                    source_claim_id="constraint",
+                )
+            ],
+        ),
+        store,
+    )
+    store.append_records(_claims(20))
+    sizes = [
+        shard.knowledge_path.stat().st_size if shard.knowledge_path.exists() else 0
+        for shard in store.shards
+    ]
+
+    store.update_status(["red"], KnowledgeStatus.QUARANTINED)
+
+    sky = shard_for_subject("sky", 4)
+    for index, shard in enumerate(store.shards):
+        size = shard.knowledge_path.stat().st_size if shard.knowledge_path.exists() else 0
+        assert (size > sizes[index]) is (index == sky)
+    assert "triple(sky,color,red)." not in export_prolog(store)
+
+
+def test_sharded_store_migrates_from_jsonl(tmp_path):
+    KnowledgeStore(tmp_path).append_records(_claims(5))
+
+    store = ShardedKnowledgeStore(tmp_path, shards=2)
+
+    assert store.migrate_from_jsonl() == 5
+    assert len(ShardedKnowledgeStore(tmp_path).load_claims()) == 5
+
+
+def test_sharded_store_routes_sources_for_claims_in_the_same_batch(tmp_path):
+    store = ShardedKnowledgeStore(tmp_path, shards=4)
+    claims = [
+        ClaimRecord(s="sky", p="color", o="blue", source_text="the sky is blue"),
+        ClaimRecord(s="sky", p="color", o="blue", source_text="sky looks blue"),
+    ]
+
+    add_extraction(ExtractionResult(claims=claims), store)
+
+    assert store.snapshot().sources_for(claims[0].id) == ["sky looks blue"]
+    with pytest.raises(ValueError, match="Unknown claim id"):
+        store.update_status(["missing"], KnowledgeStatus.QUARANTINED)
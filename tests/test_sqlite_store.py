@@ -0,0 +1,93 @@
+from logical import cli
+from logical.schema import ClaimRecord, ConstraintRecord, ExtractionResult, KnowledgeStatus
+from logical.service import add_extraction, export_prolog
+from logical.sqlite_store import SQLiteKnowledgeStore
+from logical.store import KnowledgeStore
+
+
+def test_sqlite_store_keeps_the_knowledge_store_surface(tmp_path):
+    store = SQLiteKnowledgeStore(tmp_path)
+    claim = ClaimRecord(
+        id="claim-1",
+        s="sky",
+        p="color",
+        o="red",
+        source_text="the sky is red",
+        confidence=0.92,
+    )
+    constraint = ConstraintRecord(
+        kind="functional_for_subject",
+        s="sky",
+        p="color",
+        source_claim_id="constraint-1",
+    )
+
+    store.append_records([constraint, claim])
+
+    assert store.load_records() == [constraint, claim]
+    assert store.load_claims(status=KnowledgeStatus.ACCEPTED) == [claim]
+    assert store.snapshot().find_claims(s="sky", p="color", o="red") == [claim]
+
+    store.update_status(["claim-1"], KnowledgeStatus.QUARANTINED)
+
+    assert store.load_claims(status=KnowledgeStatus.ACCEPTED) == []
+    assert store.snapshot().claim("claim-1").status is KnowledgeStatus.QUARANTINED
+
+
+def test_sqlite_store_runs_conflict_checks_and_projection(tmp_path):
+    store = SQLiteKnowledgeStore(tmp_path)
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(id="red", s="sky", p="color", o="red", source_text="r")],
+            constraints=[
+                ConstraintRecord(
+                    kind="functional_for_subject",
+                    s="sky",
+                    p="color",
+                    source_claim_id="constraint",
+                )
+            ],
+        ),
+        store,
+    )
+
+    result = add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(id="blue", s="sky", p="color", o="blue", source_text="b")]
+        ),
+        store,
+    )
+
+    assert [conflict.existing_claim_id for conflict in result.conflicts] == ["red"]
+    assert "triple(sky,color,red)." in export_prolog(store)
+    assert "triple(sky,color,blue)." not in export_prolog(store)
+
+
+def test_cli_migrates_jsonl_store_into_sqlite(tmp_path, capsys):
+    KnowledgeStore(tmp_path).append_records(
+        [ClaimRecord(id="red", s="sky", p="color", o="red", source_text="r")]
+    )
+
+    assert (
+        cli.main(["--store-dir", str(tmp_path), "--store-backend", "sqlite", "migrate"])
+        == 0
+    )
+    assert "migrated 1 records" in capsys.readouterr().out
+
+    cli.main(["--store-dir", str(tmp_path), "--store-backend", "sqlite", "export-prolog"])
+    assert "triple(sky,color,red)." in capsys.readouterr().out
+
+
+def test_sqlite_store_records_repeat_sources_without_duplicating_claims(tmp_path):
+    store = SQLiteKnowledgeStore(tmp_path)
+    for text in ("the sky is blue", "the sky is blue", "blue sky"):
+        add_extraction(
+            ExtractionResult(
+                claims=[ClaimRecord(s="sky", p="color", o="blue", source_text=text)]
+            ),
+            store,
+        )
+
+    claims = store.load_claims()
+    assert len(claims) == 1
+    assert store.snapshot().sources_for(claims[0].id) == ["blue sky"]
@@ -1,15 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import threading
+import time
 
-from logical.conflicts import find_conflicts
-from logical.prolog import project_world
+from logical import cli
+from logical import service
+from logical import store as store_module
+from logical.binary_snapshot import MappedSnapshot
+from logical.conflicts import ConflictIndex, find_conflicts
+from logical.locking import GroupCommit
+from logical.prolog import project_world, query_for_intent
 from logical.schema import (
+    AliasRecord,
     ClaimRecord,
     ConstraintRecord,
     ExtractionResult,
     KnowledgeStatus,
+    QueryIntent,
     RecordType,
+    StatusRecord,
+    claim_id_for,
 )
-from logical.service import add_extraction
+from logical.service import add_extraction, export_prolog, rebuild_world
 from logical.store import KnowledgeStore
 
 
@@ -59,6 +71,9 @@ def test_prolog_projection_uses_only_accepted_claims(tmp_path):
     assert "triple(sky,color,red)." in world
     assert "triple(sky,color,blue)." not in world
     assert "functional_for_subject(sky,color)." in world
+    assert "claim_id('claim-1',sky,color,red)." in world
+    assert "claim_id('claim-2'" not in world
+    assert "answer(S,P,O,true,true) :- triple(S,P,O), !." in world
 
 
 def test_functional_constraint_conflict_is_detected():
@@ -176,3 +191,845 @@ def test_unsupported_constraint_is_rejected_without_blocking_valid_claim(tmp_pat
     assert result.accepted == [claim]
     assert {issue.kind for issue in result.invalid} == {"unsupported_constraint"}
     assert store.load_constraints() == []
+
+
+def test_snapshot_is_reused_until_the_log_changes(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red"),
+            ClaimRecord(id="claim-2", s="sky", p="size", o="big", source_text="big"),
+        ]
+    )
+
+    snapshot = store.snapshot()
+
+    assert store.snapshot() is snapshot
+    assert [claim.id for claim in snapshot.find_claims(s="sky", p="color")] == [
+        "claim-1"
+    ]
+    assert [claim.id for claim in snapshot.find_claims(p="size")] == ["claim-2"]
+    assert snapshot.claim("claim-2").o == "big"
+
+    store.rewrite_records(snapshot.records[:1])
+
+    assert store.snapshot() is not snapshot
+    assert [claim.id for claim in store.load_claims()] == ["claim-1"]
+
+
+def test_snapshot_reads_only_the_appended_tail(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red")]
+    )
+    snapshot = store.snapshot()
+    with Path(tmp_path, "knowledge.jsonl").open("a", encoding="utf-8") as handle:
+        handle.write('{"id": "claim-2", "o": "blue", "p": "color"')
+
+    assert store.snapshot() is snapshot
+    assert len(snapshot) == 1
+
+    with Path(tmp_path, "knowledge.jsonl").open("a", encoding="utf-8") as handle:
+        handle.write(
+            ', "s": "sea", "source_text": "blue", "status": "accepted", '
+            '"type": "claim"}\n'
+        )
+
+    assert store.snapshot() is snapshot
+    assert [claim.id for claim in store.snapshot().find_claims(o="blue")] == ["claim-2"]
+
+
+def test_status_changes_are_appended_and_folded_by_compact(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red")]
+    )
+    knowledge_path = Path(tmp_path, "knowledge.jsonl")
+    before = knowledge_path.read_text()
+
+    store.update_status(["claim-1"], KnowledgeStatus.QUARANTINED)
+
+    assert knowledge_path.read_text().startswith(before)
+    assert store.load_claims(status=KnowledgeStatus.ACCEPTED) == []
+    assert KnowledgeStore(tmp_path).load_claims()[0].status is KnowledgeStatus.QUARANTINED
+
+    assert store.compact() == 1
+
+    lines = knowledge_path.read_text().splitlines()
+    assert len(lines) == 1
+    assert '"status": "quarantined"' in lines[0]
+    assert store.load_claims()[0].status is KnowledgeStatus.QUARANTINED
+
+
+def test_snapshot_interns_terms_into_integer_columns(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ClaimRecord(id="claim-1", s="sky", p="color", o="blue", source_text="a"),
+            ClaimRecord(id="claim-2", s="sea", p="color", o="blue", source_text="b"),
+        ]
+    )
+
+    snapshot = store.snapshot()
+
+    assert snapshot.terms.terms == ["sky", "color", "blue", "sea"]
+    assert list(snapshot.columns.p) == [1, 1]
+    assert list(snapshot.columns.o) == [2, 2]
+    assert list(snapshot.triples(KnowledgeStatus.ACCEPTED)) == [
+        ("sky", "color", "blue", True),
+        ("sea", "color", "blue", True),
+    ]
+    assert store.load_records() == [
+        ClaimRecord(
+            id="claim-1",
+            s="sky",
+            p="color",
+            o="blue",
+            source_text="a",
+            created_at=snapshot.created_at[0],
+        ),
+        ClaimRecord(
+            id="claim-2",
+            s="sea",
+            p="color",
+            o="blue",
+            source_text="b",
+            created_at=snapshot.created_at[1],
+        ),
+    ]
+
+
+def test_binary_snapshot_is_mapped_and_combined_with_newer_tail(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ConstraintRecord(
+                kind="functional_for_subject",
+                s="sky",
+                p="color",
+                source_claim_id="constraint-1",
+            ),
+            ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red"),
+            ClaimRecord(id="claim-2", s="sea", p="color", o="blue", source_text="blue"),
+        ]
+    )
+    store.update_status(["claim-2"], KnowledgeStatus.QUARANTINED)
+    store.write_snapshot()
+    store.append_records(
+        [ClaimRecord(id="claim-3", s="sky", p="size", o="big", source_text="big")]
+    )
+    store.update_status(["claim-1"], KnowledgeStatus.QUARANTINED)
+
+    reopened = KnowledgeStore(tmp_path)
+    snapshot = reopened.snapshot()
+
+    assert snapshot.base is not None
+    assert snapshot.base_rows == 2
+    assert [claim.id for claim in reopened.load_claims()] == [
+        "claim-1",
+        "claim-2",
+        "claim-3",
+    ]
+    assert [claim.id for claim in reopened.load_claims(KnowledgeStatus.ACCEPTED)] == [
+        "claim-3"
+    ]
+    assert [claim.id for claim in snapshot.find_claims(s="sky")] == [
+        "claim-1",
+        "claim-3",
+    ]
+    assert snapshot.claim("claim-1").status is KnowledgeStatus.QUARANTINED
+    assert reopened.load_records() == store.load_records()
+    assert len(reopened.load_constraints()) == 1
+
+    base = snapshot.base
+    reopened.close()
+    assert base._map.closed and base._descriptor is None
+    assert [claim.id for claim in reopened.load_claims()] == [
+        "claim-1",
+        "claim-2",
+        "claim-3",
+    ]
+
+    with MappedSnapshot(tmp_path / "snapshot.bin", store.knowledge_path) as mapped:
+        assert mapped.read_claim(mapped.claim_row("claim-2")).o == "blue"
+    assert mapped._map.closed
+
+    reopened.compact()
+
+    assert KnowledgeStore(tmp_path).snapshot().base is None
+
+
+def test_rewriting_the_log_invalidates_the_binary_snapshot(tmp_path):
+    def claims(subject):
+        return [
+            ClaimRecord(
+                id=f"{subject}-{index}", s=subject, p="size", o="big", source_text="x"
+            )
+            for index in range(3)
+        ]
+
+    store = KnowledgeStore(tmp_path)
+    store.append_records(claims("e000"))
+    store.write_snapshot()
+    store.rewrite_records(claims("f000"))
+
+    assert not store.snapshot_path.exists()
+    reopened = KnowledgeStore(tmp_path)
+    assert [claim.s for claim in reopened.snapshot().find_claims(s="f000")] == [
+        "f000"
+    ] * 3
+    assert reopened.snapshot().find_claims(s="e000") == []
+
+    reopened.write_snapshot()
+    rewritten = store.knowledge_path.read_bytes().replace(b"f000", b"e000")
+    with store.knowledge_path.open("r+b") as handle:
+        handle.write(rewritten)
+
+    same_inode = KnowledgeStore(tmp_path).snapshot()
+    assert same_inode.base is None
+    assert [claim.id for claim in same_inode.find_claims(s="e000")] == [
+        "e000-0",
+        "e000-1",
+        "e000-2",
+    ]
+
+
+def test_stored_records_skip_normalization_but_legacy_lines_do_not(tmp_path):
+    knowledge_path = Path(tmp_path, "knowledge.jsonl")
+    knowledge_path.write_text(
+        '{"id": "legacy", "o": "Red", "p": "Color", "s": "The Sky", '
+        '"source_text": "the sky is red", "status": "accepted", "type": "claim"}\n'
+        '{"created_at": "2024-01-01T00:00:00+00:00", "confidence": 1.0, '
+        '"id": "stored", "o": "blue", "p": "color", "polarity": true, "s": "sea", '
+        '"source_text": "the sea is blue", "status": "accepted", "type": "claim", '
+        '"v": 2}\n'
+    )
+
+    legacy, stored = KnowledgeStore(tmp_path).load_claims()
+
+    assert (legacy.s, legacy.p, legacy.o) == ("sky", "color", "red")
+    assert (stored.s, stored.p, stored.o) == ("sea", "color", "blue")
+    assert stored.status is KnowledgeStatus.ACCEPTED
+    assert stored.type is RecordType.CLAIM
+
+
+def test_concurrent_writers_are_serialized_and_group_committed(tmp_path):
+    stores = [
+        KnowledgeStore(tmp_path),
+        KnowledgeStore(tmp_path, group_commit=True, commit_delay=0.001),
+    ]
+
+    def write(index):
+        store = stores[index % 2]
+        store.append_records(
+            ClaimRecord(
+                id=f"claim-{index}-{part}",
+                s=f"entity {index}",
+                p="part",
+                o=f"value {part}",
+                source_text="bulk",
+            )
+            for part in range(5)
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(40)))
+
+    claims = KnowledgeStore(tmp_path).load_claims()
+    assert len(claims) == 200
+    assert len({claim.id for claim in claims}) == 200
+
+
+def test_group_commit_reports_a_failure_to_every_ticket_in_the_batch():
+    first_write = threading.Event()
+    second_done = threading.Event()
+
+    def write(lines):
+        first_write.wait()
+        raise OSError("disk full")
+
+    class LateWake(threading.Condition):
+        def wait(self, timeout=None):
+            woke = super().wait(timeout)
+            if threading.current_thread().name == "late":
+                self.release()
+                second_done.wait()
+                self.acquire()
+            return woke
+
+    commit = GroupCommit(write, delay=0.05)
+    commit._condition = LateWake()
+    errors = []
+
+    def submit(line):
+        try:
+            commit.submit([line])
+        except RuntimeError as error:
+            errors.append((line, error))
+
+    leader = threading.Thread(target=submit, args=("a\n",))
+    late = threading.Thread(target=submit, args=("b\n",), name="late")
+    leader.start()
+    while commit._queued < 1:
+        time.sleep(0.001)
+    late.start()
+    while commit._queued < 2:
+        time.sleep(0.001)
+    first_write.set()
+    leader.join()
+    submit("c\n")
+    second_done.set()
+    late.join()
+
+    assert sorted(line for line, _ in errors) == ["a\n", "b\n", "c\n"]
+    assert commit._failures == {}
+
+
+def test_torn_final_line_is_truncated_before_the_next_append(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red")]
+    )
+    knowledge_path = Path(tmp_path, "knowledge.jsonl")
+    with knowledge_path.open("a", encoding="utf-8") as handle:
+        handle.write('{"id": "torn", "o": "bl')
+
+    store.append_records(
+        [ClaimRecord(id="claim-2", s="sea", p="color", o="blue", source_text="blue")]
+    )
+
+    assert [claim.id for claim in KnowledgeStore(tmp_path).load_claims()] == [
+        "claim-1",
+        "claim-2",
+    ]
+    with knowledge_path.open("a", encoding="utf-8") as handle:
+        handle.write('{"id": "torn"')
+    assert store.recover() == len('{"id": "torn"')
+    assert knowledge_path.read_text().endswith("\n")
+
+
+def test_iter_records_filters_lines_before_building_records(tmp_path, monkeypatch):
+    store = KnowledgeStore(tmp_path)
+    constraint = ConstraintRecord(
+        kind="functional_for_subject",
+        s="sky",
+        p="color",
+        source_claim_id="constraint-1",
+    )
+    store.append_records(
+        [
+            constraint,
+            ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red"),
+            ClaimRecord(id="claim-2", s="sea", p="color", o="blue", source_text="blue"),
+            ClaimRecord(id="claim-3", s="sky", p="size", o="big", source_text="big"),
+        ]
+    )
+    store.update_status(["claim-3"], KnowledgeStatus.QUARANTINED)
+    built = []
+    original = store_module.record_from_stored
+
+    def counting(data):
+        built.append(data.get("id"))
+        return original(data)
+
+    monkeypatch.setattr(store_module, "record_from_stored", counting)
+
+    claims = store.iter_records(
+        type=RecordType.CLAIM, status=KnowledgeStatus.ACCEPTED, subject="sky"
+    )
+
+    assert [claim.id for claim in claims] == ["claim-1"]
+    assert "claim-2" not in built
+    assert list(store.iter_records(type=RecordType.CONSTRAINT)) == [constraint]
+    assert [
+        claim.id
+        for claim in store.iter_records(status=KnowledgeStatus.QUARANTINED)
+    ] == ["claim-3"]
+
+
+def test_cli_export_streams_the_same_world_as_export_prolog(tmp_path, capsys):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="red"),
+            ConstraintRecord(
+                kind="functional_for_subject",
+                s="sky",
+                p="color",
+                source_claim_id="constraint-1",
+            ),
+        ]
+    )
+
+    assert cli.main(["--store-dir", str(tmp_path), "export-prolog"]) == 0
+
+    assert capsys.readouterr().out == export_prolog(store)
+
+    store.append_records(
+        [
+            AliasRecord(canonical="colour", alias="hue"),
+            ClaimRecord(id="claim-2", s="sea", p="hue", o="blue", source_text="b"),
+            ClaimRecord(id="claim-3", s="apple", p="colour", o="red", source_text="a"),
+            ClaimRecord(
+                id="claim-4", s="sea", p="hue", o="red", source_text="n", polarity=False
+            ),
+        ]
+    )
+    arguments = ["--store-dir", str(tmp_path), "--projection", "partitioned"]
+
+    assert cli.main([*arguments, "export-prolog"]) == 0
+
+    streamed = capsys.readouterr().out
+    assert streamed == export_prolog(store, "partitioned")
+    assert "p_colour(apple,red).\np_colour(sea,blue)." in streamed
+
+
+def test_status_records_apply_only_to_earlier_claim_lines(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [
+            StatusRecord("claim-1", KnowledgeStatus.QUARANTINED),
+            ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="r"),
+            ClaimRecord(id="claim-2", s="sky", p="color", o="blue", source_text="b"),
+            StatusRecord("claim-2", KnowledgeStatus.QUARANTINED),
+        ]
+    )
+
+    streamed = store.iter_records(
+        type=RecordType.CLAIM, status=KnowledgeStatus.ACCEPTED
+    )
+    accepted = store.snapshot().claims(KnowledgeStatus.ACCEPTED)
+    assert [claim.id for claim in streamed] == [claim.id for claim in accepted]
+    assert [claim.id for claim in accepted] == ["claim-1"]
+
+
+def test_replacing_a_claim_from_the_same_batch_exports_consistently(
+    tmp_path, capsys, monkeypatch
+):
+    store = KnowledgeStore(tmp_path)
+    monkeypatch.setattr("builtins.input", lambda _: "r")
+    add_extraction(
+        ExtractionResult(
+            claims=[
+                ClaimRecord(s="sky", p="color", o="red", source_text="red"),
+                ClaimRecord(s="sky", p="color", o="blue", source_text="blue"),
+            ],
+            constraints=[constraint("functional_for_subject", "color", s="sky")],
+        ),
+        store,
+        interactive=True,
+    )
+    capsys.readouterr()
+
+    assert cli.main(["--store-dir", str(tmp_path), "export-prolog"]) == 0
+
+    streamed = capsys.readouterr().out
+    assert streamed == export_prolog(KnowledgeStore(tmp_path))
+    assert "triple(sky,color,blue)." in streamed
+    assert "triple(sky,color,red)." not in streamed
+
+
+def test_claim_ids_are_derived_from_the_normalized_triple():
+    first = ClaimRecord(s="The Sky", p="color", o="Blue", source_text="a")
+    second = ClaimRecord(s="sky", p="color", o="blue", source_text="b")
+    negated = ClaimRecord(s="sky", p="color", o="blue", source_text="c", polarity=False)
+
+    assert first.id == second.id
+    assert first.id.startswith("claim-")
+    assert negated.id != first.id
+
+
+def test_reingesting_a_claim_adds_no_bytes_and_records_new_sources(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    knowledge_path = Path(tmp_path, "knowledge.jsonl")
+
+    def ingest(text):
+        claim = ClaimRecord(s="sky", p="color", o="blue", source_text=text)
+        return add_extraction(ExtractionResult(claims=[claim]), store)
+
+    assert len(ingest("the sky is blue").accepted) == 1
+    before = knowledge_path.read_text()
+
+    result = ingest("the sky is blue")
+
+    assert result.accepted == []
+    assert [claim.o for claim in result.duplicates] == ["blue"]
+    assert knowledge_path.read_text() == before
+
+    ingest("blue is the color of the sky")
+    ingest("blue is the color of the sky")
+
+    lines = knowledge_path.read_text().splitlines()
+    assert len(lines) == 2
+    assert '"type": "source"' in lines[1]
+    claim_id = store.load_claims()[0].id
+    assert store.snapshot().sources_for(claim_id) == ["blue is the color of the sky"]
+    assert KnowledgeStore(tmp_path).snapshot().sources_for(claim_id) == [
+        "blue is the color of the sky"
+    ]
+    assert export_prolog(store).count("triple(sky,color,blue).") == 1
+
+
+def test_reingesting_a_quarantined_claim_restores_it_when_it_no_longer_conflicts(
+    tmp_path,
+):
+    store = KnowledgeStore(tmp_path)
+    store.append_records(
+        [ClaimRecord(s="sky", p="color", o="blue", source_text="blue")]
+    )
+    claim_id = store.load_claims()[0].id
+    store.update_status([claim_id], KnowledgeStatus.QUARANTINED)
+
+    result = add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="sky", p="color", o="blue", source_text="blue")]
+        ),
+        store,
+    )
+
+    assert [claim.id for claim in result.accepted] == [claim_id]
+    assert len(store.load_records()) == 1
+    assert store.snapshot().claim(claim_id).status is KnowledgeStatus.ACCEPTED
+
+
+def test_world_is_rebuilt_only_when_the_generation_changes(tmp_path, monkeypatch):
+    store = KnowledgeStore(tmp_path)
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="sky", p="color", o="blue", source_text="blue")]
+        ),
+        store,
+    )
+    world_path = Path(rebuild_world(store))
+    writes = []
+    original_write_world = store.write_world
+    monkeypatch.setattr(
+        store,
+        "write_world",
+        lambda text: writes.append(text) or original_write_world(text),
+    )
+    compiles = []
+    monkeypatch.setattr(service, "compile_world", compiles.append)
+
+    rebuild_world(store)
+    assert writes == []
+
+    before = world_path.read_text()
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="grass", p="color", o="green", source_text="g")]
+        ),
+        store,
+    )
+    rebuild_world(store)
+
+    assert writes == [] and compiles == []
+    grass_id = claim_id_for("grass", "color", "green", True)
+    assert world_path.read_text() == (
+        before
+        + "triple(grass,color,green).\n"
+        + f"claim_id('{grass_id}',grass,color,green).\n"
+    )
+
+    store.update_status([store.load_claims()[0].id], KnowledgeStatus.QUARANTINED)
+    rebuild_world(store)
+
+    assert len(writes) == 1 and compiles == [world_path]
+    assert world_path.read_text() == export_prolog(store)
+    assert "triple(sky,color,blue)." not in world_path.read_text()
+
+
+def test_partitioned_projection_emits_sorted_relation_predicates():
+    claims = [
+        ClaimRecord(id="claim-3", s="sky", p="color", o="blue", source_text="c"),
+        ClaimRecord(id="claim-1", s="apple", p="color", o="red", source_text="a"),
+        ClaimRecord(id="claim-2", s="sky", p="above", o="sea", source_text="b"),
+        ClaimRecord(
+            id="claim-4", s="sky", p="color", o="green", source_text="d", polarity=False
+        ),
+    ]
+
+    lines = project_world(claims, [], projection="partitioned").splitlines()
+
+    facts = [line for line in lines if line.startswith(("p_", "triple("))]
+    assert facts == [
+        "triple(S,above,O) :- p_above(S,O).",
+        "p_above(sky,sea).",
+        "triple(S,color,O) :- p_color(S,O).",
+        "p_color(apple,red).",
+        "p_color(sky,blue).",
+    ]
+    assert "neg_triple(sky,color,green)." in lines
+    assert "claim_id('claim-1',apple,color,red)." in lines
+    assert query_for_intent(QueryIntent(s="?x", p="color", o="red"), "partitioned") == (
+        "(current_predicate(p_color/2), p_color(V_x,red), "
+        "claim_id(Id,V_x,color,red) ; inferred(V_x,color,red,Id))"
+    )
+
+
+def test_switching_projection_rebuilds_the_whole_world(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="sky", p="color", o="blue", source_text="blue")]
+        ),
+        store,
+    )
+    world_path = Path(rebuild_world(store, "partitioned"))
+    assert world_path.read_text() == export_prolog(store, "partitioned")
+
+    add_extraction(
+        ExtractionResult(
+            claims=[ClaimRecord(s="grass", p="color", o="green", source_text="g")]
+        ),
+        store,
+    )
+    rebuild_world(store, "partitioned")
+    assert world_path.read_text() == export_prolog(store, "partitioned")
+
+    rebuild_world(store)
+    assert world_path.read_text() == export_prolog(store)
+
+
+def test_transitive_constraint_is_accepted_and_projected_as_a_tabled_closure(
+    tmp_path,
+):
+    store = KnowledgeStore(tmp_path)
+    constraint = ConstraintRecord(
+        kind="transitive", s="", p="part_of", source_claim_id="constraint-1"
+    )
+
+    result = add_extraction(ExtractionResult(constraints=[constraint]), store)
+
+    assert result.invalid == []
+    world = export_prolog(store)
+    assert "transitive(part_of)." in world
+    assert ":- table closure/3." in world
+    assert "answer(S,P,O,true,true) :- closure(S,P,O), !." in world
+
+
+def test_conflict_index_reports_conflicts_in_existing_claim_order():
+    constraint = ConstraintRecord(
+        kind="functional_for_subject", s="sky", p="color", source_claim_id="c"
+    )
+    existing = [
+        ClaimRecord(id="claim-1", s="sky", p="color", o="red", source_text="r"),
+        ClaimRecord(
+            id="claim-2",
+            s="sky",
+            p="color",
+            o="blue",
+            source_text="not blue",
+            polarity=False,
+        ),
+        ClaimRecord(id="claim-3", s="sky", p="size", o="big", source_text="b"),
+        ClaimRecord(id="claim-4", s="sky", p="color", o="grey", source_text="g"),
+    ]
+    candidate = ClaimRecord(id="new", s="sky", p="color", o="blue", source_text="x")
+    index = ConflictIndex(
+        [constraint], load=lambda s, p, o: [c for c in existing if c.p == p]
+    )
+
+    conflicts = index.conflicts(candidate)
+
+    assert conflicts == find_conflicts(candidate, existing, [constraint])
+    assert [(c.kind, c.existing_claim_id) for c in conflicts] == [
+        ("functional_for_subject", "claim-1"),
+        ("direct_contradiction", "claim-2"),
+        ("functional_for_subject", "claim-4"),
+    ]
+
+    index.remove_claims(["claim-1", "claim-2"])
+    index.add_claim(candidate)
+
+    grey = ClaimRecord(id="grey", s="sky", p="color", o="grey", source_text="g")
+    assert [c.existing_claim_id for c in index.conflicts(grey)] == ["new"]
+
+
+def constraint(kind, p, o="", s=""):
+    return ConstraintRecord(kind=kind, s=s, p=p, o=o, source_claim_id=kind)
+
+
+def test_richer_constraint_kinds_report_conflicts_at_ingest(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    constraints = [
+        constraint("max_cardinality", "parent", "2", s="ann"),
+        constraint("inverse_functional", "ssn"),
+        constraint("symmetric", "married_to"),
+        constraint("inverse_of", "parent_of", "child_of"),
+        constraint("disjoint_values", "likes", "dislikes"),
+    ]
+
+    def claim(s, p, o, polarity=True):
+        return ClaimRecord(s=s, p=p, o=o, source_text="text", polarity=polarity)
+
+    first = add_extraction(
+        ExtractionResult(
+            claims=[
+                claim("ann", "parent", "bob"),
+                claim("ann", "parent", "cat"),
+                claim("ann", "ssn", "123"),
+                claim("bob", "married_to", "cat"),
+                claim("bob", "parent_of", "ann"),
+                claim("ann", "likes", "tea"),
+            ],
+            constraints=constraints,
+        ),
+        store,
+    )
+    assert first.invalid == [] and first.conflicts == []
+
+    result = add_extraction(
+        ExtractionResult(
+            claims=[
+                claim("ann", "parent", "dan"),
+                claim("bob", "ssn", "123"),
+                claim("cat", "married_to", "bob", polarity=False),
+                claim("ann", "child_of", "bob", polarity=False),
+                claim("ann", "dislikes", "tea"),
+                claim("ann", "parent", "bob"),
+            ]
+        ),
+        store,
+    )
+
+    assert [conflict.kind for conflict in result.conflicts] == [
+        "max_cardinality",
+        "max_cardinality",
+        "inverse_functional",
+        "symmetric",
+        "inverse_of",
+        "disjoint_values",
+    ]
+    assert result.conflicts[0].message == (
+        "ann parent can have at most 2 values; bob is already accepted"
+    )
+    assert len(result.quarantined) == 5
+    assert [duplicate.o for duplicate in result.duplicates] == ["bob"]
+
+
+def test_richer_constraint_kinds_are_validated_and_projected(tmp_path):
+    store = KnowledgeStore(tmp_path)
+    result = add_extraction(
+        ExtractionResult(
+            constraints=[
+                constraint("max_cardinality", "parent", "two", s="ann"),
+                constraint("inverse_of", "parent_of"),
+                constraint("max_cardinality", "parent", "2", s="ann"),
+                constraint("symmetric", "married_to"),
+                constraint("disjoint_values", "likes", "dislikes"),
+            ]
+        ),
+        store,
+    )
+
+    assert [issue.kind for issue in result.invalid] == [
+        "invalid_constraint_value",
+        "missing_constraint_term",
+    ]
+    world = export_prolog(store)
+    assert "max_cardinality(ann,parent,2)." in world
+    assert "symmetric(married_to)." in world
+    assert "disjoint_values(likes,dislikes)." in world
+    assert "answer(S,P,O,true,true) :- mirrored(S,P,O), !." in world
+
+
+def test_parallel_import_matches_sequential_ingest(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "PARALLEL_IMPORT_CLAIMS", 0)
+    monkeypatch.setattr("os.cpu_count", lambda: 2)
+    pools = []
+
+    class RecordingPool(service.ProcessPoolExecutor):
+        def __init__(self, max_workers, **kwargs):
+            pools.append(max_workers)
+            super().__init__(max_workers, **kwargs)
+
+    monkeypatch.setattr(service, "ProcessPoolExecutor", RecordingPool)
+
+    def claim(s, p, o, polarity=True):
+        return ClaimRecord(s=s, p=p, o=o, source_text=f"{s} {p}", polarity=polarity)
+
+    seed = ExtractionResult(
+        claims=[claim("sky", "color", "blue"), claim("bob", "married_to", "cat")],
+        constraints=[
+            constraint("functional_for_subject", "color", s="sky"),
+            constraint("symmetric", "married_to"),
+        ],
+    )
+    bulk = ExtractionResult(
+        claims=[
+            claim("sky", "color", "red"),
+            claim("grass", "color", "green"),
+            claim("cat", "married_to", "bob", polarity=False),
+            claim("grass", "color", "green", polarity=False),
+            claim("sky", "color", "blue"),
+            claim("sea", "color", "?"),
+            *(claim(f"s{index}", "size", str(index % 3)) for index in range(40)),
+            claim("dan", "married_to", "eve"),
+            claim("eve", "married_to", "dan", polarity=False),
+        ],
+        constraints=[constraint("max_cardinality", "size", "1", s="s4")],
+    )
+
+    outcomes = []
+    for workers in (None, 2):
+        store = KnowledgeStore(tmp_path / str(workers))
+        add_extraction(seed, store)
+        result = add_extraction(bulk, store, workers=workers)
+        snapshot = store.snapshot()
+        outcomes.append(
+            (
+                [claim.id for claim in result.accepted],
+                [claim.id for claim in result.quarantined],
+                [conflict.message for conflict in result.conflicts],
+                [issue.message for issue in result.invalid],
+                [claim.id for claim in result.duplicates],
+                sorted((claim.id, claim.status) for claim in snapshot.claims()),
+            )
+        )
+
+    assert pools == [2]
+    assert outcomes[0] == outcomes[1]
+    assert len(outcomes[0][2]) == 4
+
+
+def test_forked_import_reads_claims_from_a_mapped_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, "PARALLEL_IMPORT_CLAIMS", 0)
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+
+    def extraction(offset):
+        return ExtractionResult(
+            claims=[
+                ClaimRecord(
+                    s=f"e{index % 50}",
+                    p=f"p{index % 3}",
+                    o=f"v{(index + offset) % 5}",
+                    source_text=f"line {index + offset}",
+                )
+                for index in range(600)
+            ],
+            constraints=[constraint("functional_for_subject", "p0", s="e1")],
+        )
+
+    outcomes = []
+    for workers in (None, 4):
+        store = KnowledgeStore(tmp_path / str(workers))
+        add_extraction(extraction(0), store)
+        store.write_snapshot()
+        reopened = KnowledgeStore(store.root)
+        assert reopened.snapshot().base is not None
+        result = add_extraction(extraction(1), reopened, workers=workers)
+        outcomes.append(
+            (
+                [claim.id for claim in result.accepted],
+                [claim.id for claim in result.duplicates],
+                [conflict.message for conflict in result.conflicts],
+                sorted(
+                    (claim.id, claim.status)
+                    for claim in KnowledgeStore(store.root).load_claims()
+                ),
+            )
+        )
+
+    assert outcomes[0] == outcomes[1]
+    assert outcomes[0][1] and outcomes[0][2]
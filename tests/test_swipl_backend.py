@@ -2,7 +2,18 @@ import shutil
 
 import pytest
 
-from logical.prolog import run_swipl_query, validate_with_swipl
+from logical.prolog import (
+    ANSWER_VALUES,
+    PrologWorker,
+    compile_world,
+    loadable_world,
+    project_world,
+    query_for_intent,
+    run_swipl_query,
+    validate_with_swipl,
+    values_for_intent,
+)
+from logical.schema import ClaimRecord, ConstraintRecord, QueryIntent
 
 
 pytestmark = pytest.mark.skipif(
@@ -20,3 +31,178 @@ def test_swipl_validates_and_queries_world_file(tmp_path):
     assert result.ok, result.message
     assert run_swipl_query(world_path, "triple(sky,color,red)") is True
     assert run_swipl_query(world_path, "triple(sky,color,blue)") is False
+
+
+def test_swipl_worker_answers_goals_and_reconsults_changed_worlds(tmp_path):
+    world_path = tmp_path / "world.pl"
+    world_path.write_text("triple(sky,color,red).\n", encoding="utf-8")
+    worker = PrologWorker()
+    try:
+        assert worker.ask(world_path, "triple(sky,color,red)") is True
+        assert worker.ask(world_path, "triple(sky,color,blue)") is False
+
+        world_path.write_text("triple(sky,color,blue).\n", encoding="utf-8")
+
+        assert worker.ask(world_path, "triple(sky,color,blue)") is True
+        assert worker.ask(world_path, "triple(sky,color,red)") is False
+    finally:
+        worker.close()
+
+
+def test_swipl_queries_load_the_compiled_world_while_it_is_current(tmp_path):
+    world_path = tmp_path / "world.pl"
+    world_path.write_text("triple(sky,color,red).\n", encoding="utf-8")
+
+    qlf_path = compile_world(world_path)
+
+    assert qlf_path == tmp_path / "world.qlf"
+    assert loadable_world(world_path) == qlf_path
+    assert validate_with_swipl(world_path).ok
+    assert run_swipl_query(world_path, "triple(sky,color,red)") is True
+
+    world_path.write_text("triple(sky,color,blue).\n", encoding="utf-8")
+
+    assert loadable_world(world_path) == world_path
+    assert run_swipl_query(world_path, "triple(sky,color,blue)") is True
+
+
+def test_answer_goal_returns_result_and_evidence_in_one_call(tmp_path):
+    red = ClaimRecord(id="claim-red", s="sky", p="color", o="red", source_text="r")
+    blue = ClaimRecord(
+        id="claim-blue",
+        s="sky",
+        p="color",
+        o="blue",
+        source_text="b",
+        polarity=False,
+    )
+    world_path = tmp_path / "world.pl"
+    world_path.write_text(project_world([red, blue], []), encoding="utf-8")
+    worker = PrologWorker()
+    try:
+        red_query = query_for_intent(QueryIntent(s="sky", p="color", o="red"))
+        blue_query = query_for_intent(QueryIntent(s="sky", p="color", o="blue"))
+        green_query = query_for_intent(QueryIntent(s="sky", p="color", o="green"))
+
+        assert worker.solve(world_path, red_query, ANSWER_VALUES) == [
+            "true",
+            "claim-red",
+        ]
+        assert worker.solve(world_path, blue_query, ANSWER_VALUES) == [
+            "false",
+            "claim-blue",
+        ]
+        assert worker.solve(world_path, green_query, ANSWER_VALUES) == ["unknown"]
+    finally:
+        worker.close()
+
+
+def test_worker_pages_through_variable_bindings(tmp_path):
+    claims = [
+        ClaimRecord(id=f"claim-{name}", s=name, p="color", o="red", source_text=name)
+        for name in ("sky", "rose", "apple")
+    ]
+    world_path = tmp_path / "world.pl"
+    world_path.write_text(project_world(claims, []), encoding="utf-8")
+    query = QueryIntent(s="?x", p="color", o="red")
+    worker = PrologWorker()
+    try:
+        goal = query_for_intent(query)
+        values = values_for_intent(query)
+
+        assert worker.solutions(world_path, goal, values, 2, 1) == [
+            ["rose", "claim-rose"],
+            ["apple", "claim-apple"],
+        ]
+        assert worker.solutions(world_path, goal, values, 2, 3) == []
+    finally:
+        worker.close()
+
+
+def test_partitioned_world_answers_through_relation_predicates(tmp_path):
+    claims = [
+        ClaimRecord(id=f"claim-{name}", s=name, p="color", o=color, source_text=name)
+        for name, color in (("sky", "blue"), ("rose", "red"), ("apple", "red"))
+    ]
+    world_path = tmp_path / "world.pl"
+    world_path.write_text(
+        project_world(claims, [], projection="partitioned"), encoding="utf-8"
+    )
+    worker = PrologWorker()
+    try:
+        red = QueryIntent(s="?x", p="color", o="red")
+        rows = worker.solutions(
+            world_path,
+            query_for_intent(red, "partitioned"),
+            values_for_intent(red),
+            10,
+        )
+        assert rows == [["apple", "claim-apple"], ["rose", "claim-rose"]]
+
+        missing = QueryIntent(s="?x", p="size", o="big")
+        assert worker.solutions(
+            world_path,
+            query_for_intent(missing, "partitioned"),
+            values_for_intent(missing),
+            10,
+        ) == []
+
+        sky = QueryIntent(s="sky", p="color", o="blue")
+        assert worker.solve(
+            world_path, query_for_intent(sky, "partitioned"), ANSWER_VALUES
+        ) == ["true", "claim-sky"]
+    finally:
+        worker.close()
+
+
+def test_tabled_closure_answers_transitive_questions_on_cycles(tmp_path):
+    claims = [
+        ClaimRecord(id=f"claim-{s}", s=s, p="is_a", o=o, source_text=s)
+        for s, o in (("poodle", "dog"), ("dog", "animal"), ("animal", "dog"))
+    ]
+    transitive = ConstraintRecord(
+        kind="transitive", s="", p="is_a", source_claim_id="constraint-1"
+    )
+    world_path = tmp_path / "world.pl"
+    world_path.write_text(project_world(claims, [transitive]), encoding="utf-8")
+    worker = PrologWorker()
+    try:
+        question = QueryIntent(s="poodle", p="is_a", o="animal")
+        assert worker.solve(
+            world_path, query_for_intent(question), ANSWER_VALUES
+        ) == ["true", "claim-poodle"]
+
+        kinds = QueryIntent(s="poodle", p="is_a", o="?kind")
+        rows = worker.solutions(
+            world_path, query_for_intent(kinds), values_for_intent(kinds), 10
+        )
+        assert sorted(rows) == [["animal", "claim-poodle"], ["dog", "claim-poodle"]]
+    finally:
+        worker.close()
+
+
+def test_world_answers_through_symmetric_and_inverse_predicates(tmp_path):
+    claims = [
+        ClaimRecord(id="m", s="bob", p="married_to", o="cat", source_text="m"),
+        ClaimRecord(id="p", s="bob", p="parent_of", o="ann", source_text="p"),
+    ]
+    constraints = [
+        ConstraintRecord(kind="symmetric", s="", p="married_to", source_claim_id="a"),
+        ConstraintRecord(
+            kind="inverse_of", s="", p="parent_of", o="child_of", source_claim_id="b"
+        ),
+    ]
+    world_path = tmp_path / "world.pl"
+    world_path.write_text(project_world(claims, constraints), encoding="utf-8")
+    worker = PrologWorker()
+    try:
+        married = QueryIntent(s="cat", p="married_to", o="bob")
+        child = QueryIntent(s="ann", p="child_of", o="bob", polarity=False)
+        assert worker.solve(
+            world_path, query_for_intent(married), ANSWER_VALUES
+        ) == ["true", "m"]
+        assert worker.solve(
+            world_path, query_for_intent(child), ANSWER_VALUES
+        ) == ["false", "p"]
+    finally:
+        worker.close()